@@ -42,6 +42,12 @@ public class PiperClient : MonoBehaviour
     [Header("Audio Output")]
     public AudioSource audioSource;
 
+    [Tooltip("Ask the server for audio at the mixer's sample rate as float32, so clips need no conversion. Off = model native format (int16).")]
+    public bool requestMixerFormat = true;
+
+    [Tooltip("Channels requested from the server when requestMixerFormat is on (1 = mono voice).")]
+    public int outputChannels = 1;
+
     [Header("References")]
     public OllamaClient ollama;
 
@@ -79,8 +85,13 @@ public class PiperClient : MonoBehaviour
     /// </summary>
     public bool IsBusy => pendingGeneration.Count > 0 || readyToPlayQueue.Count > 0 || isPlaying || activeGenerators > 0;
 
+    private int mixerSampleRate;
+
     void Awake()
     {
+        // AudioSettings is main-thread only: read it here, not in the async request path
+        mixerSampleRate = AudioSettings.outputSampleRate;
+
         if (audioSource == null)
             audioSource = GetComponent<AudioSource>();
 
@@ -151,6 +162,9 @@ public class PiperClient : MonoBehaviour
         public string speaker; // For API compatibility
         public int speaker_id; // Piper speaker ID (0-299)
         public float length_scale; // Speech rate (1.0=normal, >1.0=slower, <1.0=faster)
+        public int sample_rate; // Output rate (0 = model native)
+        public int channels; // Output channels (0 = mono)
+        public string sample_format; // "int16" / "float32" ("" = int16)
     }
 
     public void Enqueue(string text, string emotion = "neutral")
@@ -656,7 +670,10 @@ public class PiperClient : MonoBehaviour
             speaker_wav = null, // Not used by Piper
             speaker = null, // For compatibility
             speaker_id = speakerId, // Use the selected speaker ID
-            length_scale = speechRate // Speech rate control
+            length_scale = speechRate, // Speech rate control
+            sample_rate = requestMixerFormat ? mixerSampleRate : 0,
+            channels = requestMixerFormat ? outputChannels : 0,
+            sample_format = requestMixerFormat ? "float32" : ""
         };
 
         string json = JsonUtility.ToJson(payload);
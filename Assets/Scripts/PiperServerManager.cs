@@ -43,8 +43,14 @@ public class PiperServerManager : MonoBehaviour
 
         proc = new Process();
         proc.StartInfo.FileName = pythonExe;
-        proc.StartInfo.Arguments = $"-m uvicorn piper_server:app --host 127.0.0.1 --port {port}";
+        // The script's own entry point: TCP + a Unix socket where the OS has one (see local_transport.py)
+        proc.StartInfo.Arguments = $"\"{serverFileName}\" --host 127.0.0.1 --port {port}";
         proc.StartInfo.WorkingDirectory = folder;
+        // StreamingAssets holds the shared local_transport.py the server imports
+        string pythonPath = System.Environment.GetEnvironmentVariable("PYTHONPATH");
+        proc.StartInfo.EnvironmentVariables["PYTHONPATH"] = string.IsNullOrEmpty(pythonPath)
+            ? Application.streamingAssetsPath
+            : Application.streamingAssetsPath + Path.PathSeparator + pythonPath;
 
         proc.StartInfo.CreateNoWindow = true;
         proc.StartInfo.UseShellExecute = false;
@@ -14,6 +14,8 @@ public class AutoVADSTTClient : MonoBehaviour
 
     [Header("STT Server")]
     public string sttUrl = "http://127.0.0.1:8007/stt";
+    [Tooltip("Send raw float PCM to <sttUrl>/raw (binary frame, see local_transport.py) instead of a multipart WAV upload.")]
+    public bool useRawFrames = true;
 
     [Header("Command Intercept")]
     public string commandPrefix = "hey Kihbbi";
@@ -284,26 +286,63 @@ public class AutoVADSTTClient : MonoBehaviour
             return;
         }
 
+        StartCoroutine(SendUtteranceToSTT(utterance.ToArray()));
+
+        utterance.Clear();
+    }
+
+    UnityWebRequest BuildWavRequest(float[] samples)
+    {
         // Create AudioClip from float buffer
         var clip = AudioClip.Create(
             "utterance",
-            utterance.Count,
+            samples.Length,
             1,
             sampleRate,
             false
         );
 
-        clip.SetData(utterance.ToArray(), 0);
+        clip.SetData(samples, 0);
 
-        // Convert to WAV bytes and send
+        // Convert to WAV bytes
         byte[] wavBytes = WavUtility.FromAudioClip(clip);
 
-        StartCoroutine(SendWavToSTT(wavBytes));
+        WWWForm form = new WWWForm();
+        form.AddBinaryData("audio", wavBytes, "audio.wav", "audio/wav");
+        return UnityWebRequest.Post(sttUrl, form);
+    }
 
-        utterance.Clear();
+    UnityWebRequest BuildFramedRequest(float[] samples)
+    {
+        // [u32 LE header length][JSON header][float32 LE PCM]: the mic samples as they are
+        byte[] head = System.Text.Encoding.UTF8.GetBytes(
+            $"{{\"sample_rate\":{sampleRate},\"channels\":1,\"sample_format\":\"float32\"}}");
+        byte[] frame = new byte[4 + head.Length + samples.Length * 4];
+        frame[0] = (byte)head.Length;
+        frame[1] = (byte)(head.Length >> 8);
+        frame[2] = (byte)(head.Length >> 16);
+        frame[3] = (byte)(head.Length >> 24);
+        Buffer.BlockCopy(head, 0, frame, 4, head.Length);
+        Buffer.BlockCopy(samples, 0, frame, 4 + head.Length, samples.Length * 4); // Unity targets are little-endian
+
+        var req = new UnityWebRequest(sttUrl + "/raw", "POST");
+        req.uploadHandler = new UploadHandlerRaw(frame) { contentType = "application/x-kihbbi-frame" };
+        req.downloadHandler = new DownloadHandlerBuffer();
+        return req;
     }
 
-    IEnumerator SendWavToSTT(byte[] wavBytes)
+    static string FrameHeaderJson(byte[] frame)
+    {
+        // Framed STT responses carry the usual /stt JSON as the header, no payload
+        if (frame == null || frame.Length < 4)
+            return null;
+        int len = frame[0] | frame[1] << 8 | frame[2] << 16 | frame[3] << 24;
+        if (len < 0 || 4 + len > frame.Length)
+            return null;
+        return System.Text.Encoding.UTF8.GetString(frame, 4, len);
+    }
+
+    IEnumerator SendUtteranceToSTT(float[] samples)
     {
         // ✅ HARD gate (most important spot)
         if (!allowSTTRequests)
@@ -320,10 +359,7 @@ public class AutoVADSTTClient : MonoBehaviour
             yield break;
         }
 
-        WWWForm form = new WWWForm();
-        form.AddBinaryData("audio", wavBytes, "audio.wav", "audio/wav");
-
-        using UnityWebRequest req = UnityWebRequest.Post(sttUrl, form);
+        using UnityWebRequest req = useRawFrames ? BuildFramedRequest(samples) : BuildWavRequest(samples);
         req.timeout = 120;
 
         if (showDebugLogs) Debug.Log("[AutoVAD] Sending audio to STT...");
@@ -332,11 +368,16 @@ public class AutoVADSTTClient : MonoBehaviour
         if (req.result != UnityWebRequest.Result.Success)
         {
             Debug.LogError("[AutoVAD] STT request failed: " + req.error);
-            Debug.LogError("[AutoVAD] Server says: " + req.downloadHandler.text);
+            Debug.LogError("[AutoVAD] Server says: " + (useRawFrames ? FrameHeaderJson(req.downloadHandler.data) : req.downloadHandler.text));
             yield break;
         }
 
-        string json = req.downloadHandler.text;
+        string json = useRawFrames ? FrameHeaderJson(req.downloadHandler.data) : req.downloadHandler.text;
+        if (string.IsNullOrEmpty(json))
+        {
+            Debug.LogError("[AutoVAD] STT response is not a valid frame");
+            yield break;
+        }
         if (showDebugLogs) Debug.Log("[AutoVAD] Raw STT JSON: " + json);
 
         STTResponse res = JsonUtility.FromJson<STTResponse>(json);
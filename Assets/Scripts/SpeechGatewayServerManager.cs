@@ -0,0 +1,174 @@
+using System.Collections.Generic;
+using System.Diagnostics;
+using System.IO;
+using UnityEngine;
+
+// Starts speech_gateway.py: Whisper + Piper + XTTS in ONE python process.
+// Use this INSTEAD of WhisperServerManager / PiperServerManager / XTTSServerManager
+// and point the clients at the gateway routes:
+//   STTClient.sttUrl   = http://127.0.0.1:8012/whisper/stt
+//   PiperClient.ttsUrl = http://127.0.0.1:8012/piper/tts
+//   XTTSClient.ttsUrl  = http://127.0.0.1:8012/xtts/tts
+//                   or http://127.0.0.1:8012/router/tts (XTTS, falls back to Piper when overloaded)
+public class SpeechGatewayServerManager : MonoBehaviour
+{
+    [Header("Startup")]
+    public bool autoStartOnLaunch = true;
+    public static bool GatewayReady = false;
+
+    [Header("Server")]
+    public int port = 8012;
+
+    [Header("Engines")]
+    public bool enableWhisper = true;
+    public bool enablePiper = true;
+    public bool enableXTTS = true;
+
+    [Tooltip("XTTS-compatible /router/tts that serves chunks with Piper when XTTS falls behind. Loads XTTS + Piper.")]
+    public bool enableRouter = false;
+
+    [Header("Compute")]
+    [Tooltip("Total CPU threads shared by all engines. 0 = all cores.")]
+    public int threadBudget = 0;
+
+    [Tooltip("How many inference jobs may run at the same time across all engines.")]
+    public int computeSlots = 2;
+
+    [Header("Paths (inside StreamingAssets)")]
+    public string serverFileName = "speech_gateway.py";
+
+    private Process proc;
+
+    // Engines the gateway reported as loaded ("[Gateway] Engine 'piper' ready in ...").
+    // Written from the output reader thread.
+    private readonly HashSet<string> loadedEngines = new HashSet<string>();
+
+    void Start()
+    {
+        if (autoStartOnLaunch)
+            StartServer();
+    }
+
+    public void StartServer()
+    {
+        if (proc != null && !proc.HasExited)
+        {
+            UnityEngine.Debug.Log("ℹ️ Speech gateway already running.");
+            return;
+        }
+
+        string folder = Application.streamingAssetsPath;
+        string serverFile = Path.Combine(folder, serverFileName);
+
+        if (!File.Exists(serverFile))
+        {
+            UnityEngine.Debug.LogError("[Gateway] speech_gateway.py not found: " + serverFile);
+            return;
+        }
+
+        var engines = new List<string>();
+        if (enableWhisper) engines.Add("whisper");
+        if (enablePiper) engines.Add("piper");
+        if (enableXTTS) engines.Add("xtts");
+        if (enableRouter) engines.Add("router");
+
+        // Same venv lookup as XTTSServerManager (XTTS has the heaviest requirements)
+        string venvPython = Path.Combine(folder, "TTS", "venv", "Scripts", "python.exe");
+        string pythonExe = File.Exists(venvPython) ? venvPython : "python";
+
+        lock (loadedEngines)
+            loadedEngines.Clear();
+
+        proc = new Process();
+        proc.StartInfo.FileName = pythonExe;
+        // The script's own entry point: TCP + a Unix socket where the OS has one (see local_transport.py)
+        proc.StartInfo.Arguments = $"\"{serverFileName}\" --host 127.0.0.1 --port {port}";
+        proc.StartInfo.WorkingDirectory = folder;
+        proc.StartInfo.EnvironmentVariables["KIHBBI_ENGINES"] = string.Join(",", engines);
+        proc.StartInfo.EnvironmentVariables["KIHBBI_COMPUTE_SLOTS"] = computeSlots.ToString();
+        if (threadBudget > 0)
+            proc.StartInfo.EnvironmentVariables["KIHBBI_THREAD_BUDGET"] = threadBudget.ToString();
+
+        proc.StartInfo.CreateNoWindow = true;
+        proc.StartInfo.UseShellExecute = false;
+        proc.StartInfo.RedirectStandardOutput = true;
+        proc.StartInfo.RedirectStandardError = true;
+
+        proc.OutputDataReceived += (_, e) => OnServerOutput(e.Data);
+        proc.ErrorDataReceived += (_, e) => OnServerOutput(e.Data);
+
+        try
+        {
+            proc.Start();
+            proc.BeginOutputReadLine();
+            proc.BeginErrorReadLine();
+            UnityEngine.Debug.Log($"✅ Speech gateway process started (engines: {string.Join(", ", engines)})");
+        }
+        catch (System.Exception ex)
+        {
+            UnityEngine.Debug.LogError($"[Gateway] Failed to start server: {ex.Message}");
+        }
+    }
+
+    private void OnServerOutput(string data)
+    {
+        if (string.IsNullOrWhiteSpace(data))
+            return;
+
+        UnityEngine.Debug.Log("[Gateway] " + data);
+
+        const string enginePrefix = "[Gateway] Engine '";
+        int start = data.IndexOf(enginePrefix);
+        if (start >= 0 && data.Contains("' ready in "))
+        {
+            start += enginePrefix.Length;
+            int end = data.IndexOf('\'', start);
+            if (end > start)
+                lock (loadedEngines)
+                    loadedEngines.Add(data.Substring(start, end - start));
+            return;
+        }
+
+        string lowerData = data.ToLower();
+        if (lowerData.Contains("application startup complete") || lowerData.Contains("uvicorn running on"))
+        {
+            GatewayReady = true;
+
+            // The per-engine flags are what the rest of the app waits on: only
+            // set them for engines the gateway actually loaded
+            lock (loadedEngines)
+            {
+                if (loadedEngines.Contains("whisper")) WhisperServerManager.STTReady = true;
+                if (loadedEngines.Contains("piper")) PiperServerManager.PiperReady = true;
+                if (loadedEngines.Contains("xtts") || loadedEngines.Contains("router")) XTTSServerManager.XTTSReady = true;
+
+                UnityEngine.Debug.Log($"✅ Speech gateway is ready (engines: {string.Join(", ", loadedEngines)})");
+            }
+        }
+    }
+
+    public void StopServer()
+    {
+        try
+        {
+            if (proc != null && !proc.HasExited)
+            {
+                proc.Kill();
+                proc.WaitForExit(2000);
+                proc.Dispose();
+                proc = null;
+
+                GatewayReady = false;
+                if (enableWhisper) WhisperServerManager.STTReady = false;
+                if (enablePiper) PiperServerManager.PiperReady = false;
+                if (enableXTTS || enableRouter) XTTSServerManager.XTTSReady = false;
+                UnityEngine.Debug.Log("🛑 Speech gateway stopped");
+            }
+        }
+        catch { }
+    }
+
+    void OnDisable() => StopServer();
+    void OnDestroy() => StopServer();
+    void OnApplicationQuit() => StopServer();
+}
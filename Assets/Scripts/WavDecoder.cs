@@ -3,20 +3,23 @@ using UnityEngine;
 
 public static class WavDecoder
 {
-    // Supports: RIFF WAV, PCM 16-bit, mono or stereo
+    // Supports: RIFF WAV, PCM 16-bit or 32-bit float, mono or stereo
     public static AudioClip ToAudioClip(byte[] wavBytes, string clipName = "wav_clip")
     {
         if (wavBytes == null || wavBytes.Length < 44)
             return null;
 
         // WAV header parsing
+        int audioFormat = BitConverter.ToInt16(wavBytes, 20);
         int channels = BitConverter.ToInt16(wavBytes, 22);
         int sampleRate = BitConverter.ToInt32(wavBytes, 24);
         int bitsPerSample = BitConverter.ToInt16(wavBytes, 34);
 
-        if (bitsPerSample != 16)
+        bool isFloat = audioFormat == 3 && bitsPerSample == 32;
+
+        if (bitsPerSample != 16 && !isFloat)
         {
-            Debug.LogError("[WavDecoder] Only 16-bit PCM WAV supported. Found: " + bitsPerSample);
+            Debug.LogError("[WavDecoder] Only 16-bit PCM or 32-bit float WAV supported. Found: " + bitsPerSample);
             return null;
         }
 
@@ -41,15 +44,24 @@ public static class WavDecoder
             return null;
         }
 
-        int samplesCount = dataChunkSize / 2; // 16-bit = 2 bytes
+        dataChunkSize = Math.Min(dataChunkSize, wavBytes.Length - dataChunkOffset);
+        int samplesCount = dataChunkSize / (bitsPerSample / 8);
         float[] samples = new float[samplesCount];
 
-        int offset = dataChunkOffset;
-        for (int i = 0; i < samplesCount; i++)
+        if (isFloat)
+        {
+            // float32 is AudioClip's own format: copy as-is
+            Buffer.BlockCopy(wavBytes, dataChunkOffset, samples, 0, samplesCount * 4);
+        }
+        else
         {
-            short sample = BitConverter.ToInt16(wavBytes, offset);
-            samples[i] = sample / 32768f;
-            offset += 2;
+            int offset = dataChunkOffset;
+            for (int i = 0; i < samplesCount; i++)
+            {
+                short sample = BitConverter.ToInt16(wavBytes, offset);
+                samples[i] = sample / 32768f;
+                offset += 2;
+            }
         }
 
         int totalFrames = samplesCount / channels;
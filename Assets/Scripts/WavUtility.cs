@@ -60,27 +60,38 @@ public static class WavUtility
         if (wavBytes == null || wavBytes.Length < 44)
             throw new ArgumentException("Invalid WAV data.");
 
+        int audioFormat = BitConverter.ToInt16(wavBytes, 20);
         int channels = BitConverter.ToInt16(wavBytes, 22);
         int sampleRate = BitConverter.ToInt32(wavBytes, 24);
         int bitsPerSample = BitConverter.ToInt16(wavBytes, 34);
+        bool isFloat = audioFormat == 3 && bitsPerSample == 32;
 
-        if (bitsPerSample != 16)
-            throw new NotSupportedException("Only 16-bit PCM WAV is supported.");
+        if (bitsPerSample != 16 && !isFloat)
+            throw new NotSupportedException("Only 16-bit PCM or 32-bit float WAV is supported.");
 
         int dataSize = BitConverter.ToInt32(wavBytes, 40);
         int dataStartIndex = 44;
         dataSize = Mathf.Min(dataSize, wavBytes.Length - dataStartIndex);
 
-        int sampleCount = dataSize / 2;
+        int sampleCount = dataSize / (bitsPerSample / 8);
         float[] samples = new float[sampleCount];
-        const float scale = 1f / 32768f;
 
-        int offset = dataStartIndex;
-        for (int i = 0; i < sampleCount; i++)
+        if (isFloat)
         {
-            short sample = BitConverter.ToInt16(wavBytes, offset);
-            samples[i] = sample * scale;
-            offset += 2;
+            // Already in AudioClip's sample format: straight copy, no per-sample work
+            Buffer.BlockCopy(wavBytes, dataStartIndex, samples, 0, sampleCount * 4);
+        }
+        else
+        {
+            const float scale = 1f / 32768f;
+
+            int offset = dataStartIndex;
+            for (int i = 0; i < sampleCount; i++)
+            {
+                short sample = BitConverter.ToInt16(wavBytes, offset);
+                samples[i] = sample * scale;
+                offset += 2;
+            }
         }
 
         int totalSamplesPerChannel = sampleCount / channels;
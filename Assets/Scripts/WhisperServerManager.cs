@@ -35,8 +35,14 @@ public class WhisperServerManager : MonoBehaviour
 
         proc = new Process();
         proc.StartInfo.FileName = "python"; // IMPORTANT: start python directly
-        proc.StartInfo.Arguments = "-m uvicorn whisper_server:app --host 127.0.0.1 --port 8007";
+        // The script's own entry point: TCP + a Unix socket where the OS has one (see local_transport.py)
+        proc.StartInfo.Arguments = "whisper_server.py --host 127.0.0.1 --port 8007";
         proc.StartInfo.WorkingDirectory = sttFolder;
+        // StreamingAssets holds the shared local_transport.py the server imports
+        string pythonPath = System.Environment.GetEnvironmentVariable("PYTHONPATH");
+        proc.StartInfo.EnvironmentVariables["PYTHONPATH"] = string.IsNullOrEmpty(pythonPath)
+            ? Application.streamingAssetsPath
+            : Application.streamingAssetsPath + Path.PathSeparator + pythonPath;
 
         proc.StartInfo.CreateNoWindow = true;
         proc.StartInfo.UseShellExecute = false;
@@ -30,6 +30,12 @@ public class XTTSClient : MonoBehaviour
     [Header("Audio Output")]
     public AudioSource audioSource;
 
+    [Tooltip("Ask the server for audio at the mixer's sample rate as float32, so clips need no conversion. Off = model native format (int16).")]
+    public bool requestMixerFormat = true;
+
+    [Tooltip("Channels requested from the server when requestMixerFormat is on (1 = mono voice).")]
+    public int outputChannels = 1;
+
     [Header("References")]
     public OllamaClient ollama;
 
@@ -49,8 +55,13 @@ public class XTTSClient : MonoBehaviour
     // Speaker caching flags (kept for compatibility; no longer used to remove speaker_wav)
     private bool speakerCached = false;
 
+    private int mixerSampleRate;
+
     void Awake()
     {
+        // AudioSettings is main-thread only: read it here, not in the async request path
+        mixerSampleRate = AudioSettings.outputSampleRate;
+
         if (audioSource == null)
             audioSource = GetComponent<AudioSource>();
 
@@ -114,6 +125,9 @@ public class XTTSClient : MonoBehaviour
         public string language;
         public string speaker_wav;
         public string speaker;
+        public int sample_rate; // Output rate (0 = model native)
+        public int channels; // Output channels (0 = mono)
+        public string sample_format; // "int16" / "float32" ("" = int16)
     }
 
     public void Enqueue(string text)
@@ -368,7 +382,10 @@ public class XTTSClient : MonoBehaviour
             text = text,
             language = language,
             speaker_wav = finalSpeakerWav,
-            speaker = string.IsNullOrWhiteSpace(speaker) ? null : speaker
+            speaker = string.IsNullOrWhiteSpace(speaker) ? null : speaker,
+            sample_rate = requestMixerFormat ? mixerSampleRate : 0,
+            channels = requestMixerFormat ? outputChannels : 0,
+            sample_format = requestMixerFormat ? "float32" : ""
         };
 
         string json = JsonUtility.ToJson(payload);
@@ -1,10 +1,15 @@
-from fastapi import FastAPI, UploadFile, File
+from fastapi import FastAPI, UploadFile, File, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
-from faster_whisper import WhisperModel
+from faster_whisper import WhisperModel, decode_audio
+from collections import deque
+import numpy as np
 import tempfile
 import os
 import time
 
+from local_transport import FrameResponse, FrameError, decode_frame, pcm_to_wav, percentile, serve_main
+
 app = FastAPI()
 
 # ------------------------------
@@ -13,13 +18,152 @@ app = FastAPI()
 MODEL_SIZE = "small"       # BEST speed/accuracy on GPU. Try "medium" later if wanted.
 DEVICE = "cuda"
 COMPUTE = "float16"        # fastest on NVIDIA GPU
+CPU_THREADS = int(os.environ.get("WHISPER_CPU_THREADS", "0"))  # 0 = CTranslate2 default (set by speech_gateway)
+
+# ------------------------------
+# TIERED MODE (WHISPER_TIERED=1)
+# ------------------------------
+# Keeps a fast and a large model resident instead of MODEL_SIZE:
+#   - audio >= LONG_AUDIO_SEC goes straight to the large model
+#   - everything else runs on the fast model, and is re-run on the large
+#     model only if the fast result looks unreliable (low avg_logprob while
+#     no_speech_prob says there IS speech)
+TIERED = os.environ.get("WHISPER_TIERED", "0") == "1"
+FAST_MODEL_SIZE = os.environ.get("WHISPER_FAST_MODEL", "base")
+LARGE_MODEL_SIZE = os.environ.get("WHISPER_LARGE_MODEL", "medium")
+LONG_AUDIO_SEC = 12.0
+ESCALATE_LOGPROB = -0.7    # fast avg_logprob below this = unsure
+ESCALATE_NO_SPEECH = 0.6   # ...unless no_speech_prob above this (then it's just silence/noise)
+
+SAMPLE_RATE = 16000        # decode_audio output rate
 
-model = WhisperModel(
-    MODEL_SIZE,
-    device=DEVICE,
-    compute_type=COMPUTE,
+TRANSCRIBE_OPTIONS = dict(
+    language="en",
+    task="transcribe",
+
+    # IMPORTANT SPEED SETTINGS:
+    beam_size=1,           # fastest decoding
+    best_of=1,             # dont do extra decoding passes
+    vad_filter=True,       # ignore silence
+    temperature=0.0,       # deterministic, faster/stable
+    condition_on_previous_text=False,  # prevents slow “context chaining”
+    without_timestamps=True # slightly faster
 )
 
+
+def load_model(size: str) -> WhisperModel:
+    return WhisperModel(
+        size,
+        device=DEVICE,
+        compute_type=COMPUTE,
+        cpu_threads=CPU_THREADS,
+    )
+
+
+if TIERED:
+    print(f"[Whisper] Tiered mode: fast={FAST_MODEL_SIZE} large={LARGE_MODEL_SIZE}")
+    models = {FAST_MODEL_SIZE: load_model(FAST_MODEL_SIZE), LARGE_MODEL_SIZE: load_model(LARGE_MODEL_SIZE)}
+else:
+    models = {MODEL_SIZE: load_model(MODEL_SIZE)}
+
+# Recent request latency per model, for /stats
+LATENCY_WINDOW = 200
+latencies = {"all": deque(maxlen=LATENCY_WINDOW)}
+
+
+def transcribe_with(size: str, audio) -> dict:
+    segments, info = models[size].transcribe(audio, **TRANSCRIBE_OPTIONS)
+    # segments is lazy: decoding happens while iterating, so keep it in the worker thread
+    segments = list(segments)
+    return {
+        "text": " ".join(seg.text.strip() for seg in segments).strip(),
+        "lang": info.language,
+        "model": size,
+        "avg_logprob": sum(seg.avg_logprob for seg in segments) / len(segments) if segments else 0.0,
+        "no_speech_prob": max((seg.no_speech_prob for seg in segments), default=1.0),
+    }
+
+
+def needs_escalation(result: dict) -> bool:
+    if not result["text"]:
+        return False
+    return result["avg_logprob"] < ESCALATE_LOGPROB and result["no_speech_prob"] < ESCALATE_NO_SPEECH
+
+
+def transcribe(source) -> dict:
+    """source: file path, file-like WAV, or float32 mono samples at SAMPLE_RATE."""
+    if not TIERED:
+        return transcribe_with(MODEL_SIZE, source)
+
+    # Decode once, reuse the samples for both tiers
+    audio = source if isinstance(source, np.ndarray) else decode_audio(source, sampling_rate=SAMPLE_RATE)
+    duration = len(audio) / SAMPLE_RATE
+
+    if duration >= LONG_AUDIO_SEC:
+        result = transcribe_with(LARGE_MODEL_SIZE, audio)
+        result["escalated"] = False
+    else:
+        result = transcribe_with(FAST_MODEL_SIZE, audio)
+        result["escalated"] = needs_escalation(result)
+        if result["escalated"]:
+            print(f"[Whisper] Escalating to {LARGE_MODEL_SIZE}: avg_logprob={result['avg_logprob']:.2f} "
+                  f"no_speech_prob={result['no_speech_prob']:.2f}")
+            result = dict(transcribe_with(LARGE_MODEL_SIZE, audio), escalated=True)
+
+    result["duration_sec"] = round(duration, 3)
+    return result
+
+
+def pcm_to_source(header: dict, pcm):
+    """Framed PCM -> what transcribe() takes. 16 kHz PCM needs no decoder at all."""
+    try:
+        rate = int(header.get("sample_rate", SAMPLE_RATE))
+        channels = int(header.get("channels", 1))
+    except (TypeError, ValueError):
+        raise FrameError("sample_rate and channels must be integers")
+    if rate <= 0 or channels < 1:
+        raise FrameError(f"Invalid sample_rate={rate} / channels={channels}")
+    fmt = header.get("sample_format", "int16")
+
+    if fmt == "int16":
+        samples = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+    elif fmt == "float32":
+        samples = np.frombuffer(pcm, dtype="<f4").astype(np.float32)
+    else:
+        raise FrameError(f"Unsupported sample_format: {fmt}")
+
+    if channels > 1:
+        samples = samples[: len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+
+    if rate == SAMPLE_RATE:
+        return samples
+    # Other rates: hand an in-memory WAV to the decoder, which resamples
+    clipped = np.clip(samples, -1.0, 1.0)
+    return pcm_to_wav((clipped * 32767).astype("<i2").tobytes(), rate, 1, "int16")
+
+
+async def run_stt(source, t0: float) -> dict:
+    # Run decoding off the event loop so other requests (and other engines
+    # hosted in the same process by speech_gateway) are not blocked.
+    result = await run_in_threadpool(transcribe, source)
+    dt = time.time() - t0
+
+    latencies["all"].append(dt)
+    latencies.setdefault(result["model"], deque(maxlen=LATENCY_WINDOW)).append(dt)
+
+    return {
+        "text": result["text"],
+        "lang": result["lang"],
+        "time_sec": round(dt, 3),
+        "model": result["model"],
+        "device": DEVICE,
+        "tiered": TIERED,
+        "escalated": result.get("escalated", False),
+        "avg_logprob": round(result["avg_logprob"], 3),
+        "no_speech_prob": round(result["no_speech_prob"], 3),
+    }
+
+
 @app.post("/stt")
 async def stt(audio: UploadFile = File(...)):
     t0 = time.time()
@@ -30,30 +174,38 @@ async def stt(audio: UploadFile = File(...)):
         path = tmp.name
 
     try:
-        segments, info = model.transcribe(
-            path,
-            language="en",
-   			task="transcribe",
-
-            # IMPORTANT SPEED SETTINGS:
-            beam_size=1,           # fastest decoding
-            best_of=1,             # dont do extra decoding passes
-            vad_filter=True,       # ignore silence
-            temperature=0.0,       # deterministic, faster/stable
-            condition_on_previous_text=False,  # prevents slow “context chaining”
-            without_timestamps=True # slightly faster
-        )
-
-        text = " ".join(seg.text.strip() for seg in segments).strip()
-        dt = time.time() - t0
-
-        return JSONResponse({
-            "text": text,
-            "lang": info.language,
-            "time_sec": round(dt, 3),
-            "model": MODEL_SIZE,
-            "device": DEVICE
-        })
+        return JSONResponse(await run_stt(path, t0))
     finally:
         if os.path.exists(path):
-            os.remove(path)
\ No newline at end of file
+            os.remove(path)
+
+
+@app.post("/stt/raw")
+async def stt_raw(request: Request):
+    """Binary-framed STT (see local_transport.py): raw PCM in, framed JSON header out."""
+    t0 = time.time()
+    try:
+        header, pcm = decode_frame(await request.body())
+        source = pcm_to_source(header, pcm)
+    except (FrameError, ValueError) as e:
+        return FrameResponse({"error": str(e)}, status_code=400)
+
+    return FrameResponse(await run_stt(source, t0))
+
+
+@app.get("/stats")
+def stats():
+    """Recent latency per model (p50/p95) - compare WHISPER_TIERED=1 against a single-model run."""
+    return {
+        "tiered": TIERED,
+        "models": list(models),
+        "latency": {
+            size: {"count": len(v), "p50": percentile(v, 0.5, 3), "p95": percentile(v, 0.95, 3)}
+            for size, v in latencies.items()
+        },
+    }
+
+
+if __name__ == "__main__":
+    # TCP for Unity + Unix socket for local clients (WhisperServerManager runs this)
+    serve_main(app, "whisper", 8007)
@@ -0,0 +1,166 @@
+"""
+Output format negotiation shared by xtts_server and piper_server.
+
+A /tts request may ask for the audio the client will actually play:
+
+    {"text": "...", "sample_rate": 48000, "channels": 2, "sample_format": "float32"}
+
+0 / empty / missing fields mean the model's native format (XTTS 24000 Hz,
+Piper voice.config.sample_rate, mono int16), so old clients are unaffected.
+Other rates are rounded to the nearest of STANDARD_SAMPLE_RATES: an
+arbitrary rate (24000 -> 191999) would need a filter with one phase per
+output sample of the reduced ratio, megabytes each.
+
+Rate conversion is a polyphase FIR resampler (Kaiser-windowed sinc, about
+-86 dB stopband). Filters are designed once per (up, down) ratio and
+cached; applying one is one matrix-vector product per phase over a strided
+view of the input, no Python loop over samples.
+
+    response = negotiate(synthesize(req), req)    # WAV Response in, WAV Response out
+"""
+from functools import lru_cache
+from typing import Literal, NamedTuple
+from math import gcd
+
+import numpy as np
+from fastapi.responses import Response
+from pydantic import BaseModel, Field
+from numpy.lib.stride_tricks import sliding_window_view
+
+from local_transport import FrameError, parse_wav, wav_header
+
+MAX_SAMPLE_RATE = 192000
+MAX_CHANNELS = 8
+# any pair of these reduces to up/down <= 2560 (largest filter ~340 KB)
+STANDARD_SAMPLE_RATES = (8000, 11025, 16000, 22050, 24000, 32000, 44100, 48000, 88200, 96000, 176400, 192000)
+
+ZERO_CROSSINGS = 16     # sinc half-width, in periods of the lower rate
+ROLLOFF = 0.945         # cutoff as a fraction of the lower Nyquist (transition band below it)
+KAISER_BETA = 8.6       # ~-86 dB stopband (beta = 0.1102 * (dB - 8.7))
+
+
+class OutputFormatFields(BaseModel):
+    """Optional output format fields, mixed into the servers' TTSRequest."""
+    sample_rate: int | None = Field(None, ge=0, le=MAX_SAMPLE_RATE)  # 0/None = native rate
+    channels: int | None = Field(None, ge=0, le=MAX_CHANNELS)       # 0/None = mono
+    sample_format: Literal["", "int16", "float32"] | None = None     # ""/None = int16
+
+
+class OutputFormat(NamedTuple):
+    sample_rate: int | None     # None = keep the source rate
+    channels: int
+    sample_format: str
+
+
+def standard_rate(rate: int) -> int:
+    return min(STANDARD_SAMPLE_RATES, key=lambda r: abs(r - rate))
+
+
+def requested_format(req) -> OutputFormat:
+    rate = getattr(req, "sample_rate", None)
+    return OutputFormat(
+        standard_rate(rate) if rate else None,
+        getattr(req, "channels", None) or 1,
+        getattr(req, "sample_format", None) or "int16",
+    )
+
+
+# ------------------------------
+# Resampling
+# ------------------------------
+@lru_cache(maxsize=32)
+def polyphase_filter(up: int, down: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Filter for resampling by up/down (reduced), split into `up` phases.
+
+    Output frame k = q*up + r reads input frames q*down + offsets[r] + t
+    (t = 0..taps-1) weighted by phases[r, t].
+    """
+    ratio = max(up, down)
+    half = ZERO_CROSSINGS * ratio            # half-length in the upsampled domain
+    cutoff = ROLLOFF / ratio
+
+    r = np.arange(up)
+    offsets = -((half - r * down) // up)     # first input frame within reach (ceil division)
+    taps = (2 * half) // up + 2
+    n = (r * down)[:, None] - (offsets[:, None] + np.arange(taps)[None, :]) * up
+
+    inside = np.abs(n) <= half
+    x = np.where(inside, n / half, 0.0)
+    window = np.i0(KAISER_BETA * np.sqrt(1.0 - x * x)) / np.i0(KAISER_BETA)
+    # * up: zero-stuffing divides the signal's energy by `up`
+    phases = np.where(inside, up * cutoff * np.sinc(cutoff * n) * window, 0.0)
+    return phases.astype(np.float32), offsets
+
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """Resample a mono float signal. Output length is ceil(len * dst / src)."""
+    samples = np.asarray(samples, dtype=np.float32)
+    if src_rate == dst_rate or len(samples) == 0:
+        return samples
+
+    g = gcd(src_rate, dst_rate)
+    up, down = dst_rate // g, src_rate // g
+    phases, offsets = polyphase_filter(up, down)
+    taps = phases.shape[1]
+
+    out_len = -(-len(samples) * up // down)
+    periods = -(-out_len // up)
+    left = max(0, -int(offsets.min()))
+    right = max(0, (periods - 1) * down + int(offsets.max()) + taps - len(samples))
+    padded = np.concatenate([np.zeros(left, np.float32), samples, np.zeros(right, np.float32)])
+    windows = sliding_window_view(padded, taps)   # (frames, taps) view, no copy
+
+    # phase r produces output frames r, r + up, r + 2*up, ... from every
+    # down-th window: a strided view, so no gathered copy of the input
+    out = np.empty((periods, up), dtype=np.float32)
+    for r in range(up):
+        start = offsets[r] + left
+        out[:, r] = windows[start:start + (periods - 1) * down + 1:down] @ phases[r]
+    return out.ravel()[:out_len]
+
+
+# ------------------------------
+# Encoding
+# ------------------------------
+def encode_wav(samples: np.ndarray, sample_rate: int, fmt: OutputFormat) -> bytes:
+    """Mono float samples at sample_rate -> WAV bytes in the requested format."""
+    rate = fmt.sample_rate or sample_rate
+    samples = resample(samples, sample_rate, rate)
+    if fmt.channels > 1:
+        samples = np.repeat(samples[:, None], fmt.channels, axis=1).ravel()  # interleaved
+
+    if fmt.sample_format == "float32":
+        pcm = np.clip(samples, -1.0, 1.0).astype("<f4").tobytes()
+    else:
+        pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+    return wav_header(rate, fmt.channels, fmt.sample_format, len(pcm)) + pcm
+
+
+def decode_wav(data: bytes) -> tuple[np.ndarray, int]:
+    """WAV bytes (int16 / float32, any channel count) -> mono float32 samples, sample rate."""
+    header, pcm = parse_wav(data)
+    if header["sample_format"] == "float32":
+        samples = np.frombuffer(pcm, dtype="<f4")
+    else:
+        samples = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+    channels = header["channels"]
+    if channels > 1:
+        samples = samples[:len(samples) // channels * channels].reshape(-1, channels).mean(axis=1)
+    return samples, header["sample_rate"]
+
+
+def negotiate(response: Response, req) -> Response:
+    """Convert a WAV Response to the format asked for in req (if any)."""
+    fmt = requested_format(req)
+    try:
+        header, _ = parse_wav(response.body)
+    except FrameError:
+        return response  # not a WAV we produced, pass it through
+    if (fmt.sample_rate in (None, header["sample_rate"]) and fmt.channels == header["channels"]
+            and fmt.sample_format == header["sample_format"]):
+        return response  # already native: no decode/encode
+
+    samples, rate = decode_wav(response.body)
+    extra = {k: v for k, v in response.headers.items() if k.lower().startswith("x-tts")}
+    return Response(content=encode_wav(samples, rate, fmt), media_type="audio/wav", headers=extra)
@@ -5,7 +5,6 @@ import tempfile
 from pathlib import Path
 from fastapi import FastAPI
 from fastapi.responses import Response
-from pydantic import BaseModel
 
 # Fix Windows encoding issues
 import sys
@@ -32,7 +31,18 @@ app = FastAPI()
 print("Loading Piper TTS...")
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# onnxruntime intra-op threads, 0 = one per core. OMP_NUM_THREADS does not
+# reach onnxruntime, so speech_gateway passes its thread budget through this.
+INTRA_OP_THREADS = int(os.environ.get("PIPER_INTRA_OP_THREADS", "0"))
+
+from local_transport import framed_tts, serve_main
+from audio_format import OutputFormatFields, negotiate
+from text_normalizer import normalize_for_piper
+
 # Initialize Piper voice - using the simpler approach
+# Model file the voice was actually loaded from (prepare_fork/post_fork must
+# share and reopen exactly this file)
+loaded_model_path = None
 try:
     # Try to load a downloaded model first, fallback to auto-download
     voice = None
@@ -45,6 +55,7 @@ try:
         # Try loading with explicit encoding handling
         try:
             voice = PiperVoice.load(model_path)
+            loaded_model_path = model_path
         except UnicodeEncodeError as enc_error:
             # Try with different path handling
             model_path_short = os.path.basename(model_path)
@@ -53,6 +64,7 @@ try:
             os.chdir(BASE_DIR)
             try:
                 voice = PiperVoice.load(model_path_short)
+                loaded_model_path = model_path
             except Exception as e2:
                 print(f"Model loading failed: {e2}")
             finally:
@@ -78,6 +90,7 @@ try:
         os.chdir(BASE_DIR)
         try:
             voice = PiperVoice.load("en_US-libritts_r-medium.onnx")  # Use relative path
+            loaded_model_path = model_path
         except Exception as load_error:
             print(f"Failed to load downloaded model: {load_error}")
         finally:
@@ -89,7 +102,78 @@ except Exception as e:
     voice = None
 
 
-class TTSRequest(BaseModel):
+def session_options():
+    import onnxruntime
+
+    opts = onnxruntime.SessionOptions()
+    if INTRA_OP_THREADS > 0:
+        opts.intra_op_num_threads = INTRA_OP_THREADS
+        opts.inter_op_num_threads = 1
+    return opts
+
+
+# PiperVoice.load() always builds a session with default options (all cores)
+if voice is not None and INTRA_OP_THREADS > 0:
+    try:
+        import onnxruntime
+        voice.session = onnxruntime.InferenceSession(
+            loaded_model_path, sess_options=session_options(), providers=voice.session.get_providers()
+        )
+        print(f"[Piper] onnxruntime limited to {INTRA_OP_THREADS} intra-op threads")
+    except Exception as e:
+        print(f"[Piper] WARNING: Could not apply thread limit, keeping default session: {e}")
+
+
+# ------------------------------
+# Preload-then-fork support (used by ../serve_workers.py)
+# ------------------------------
+# onnxruntime sessions own thread pools that don't survive fork(), so the
+# master keeps only the raw weights (numpy arrays, shared copy-on-write with
+# every worker) and each worker builds its own session on top of them with
+# add_initializer - ORT then uses those buffers directly instead of copying.
+_shared_initializers = None
+
+
+def prepare_fork():
+    """Called once in the master process before forking workers."""
+    global _shared_initializers
+    import onnx
+    from onnx import numpy_helper
+
+    if voice is None or loaded_model_path is None:
+        raise RuntimeError("Piper voice not loaded, nothing to share")
+    proto = onnx.load(loaded_model_path)
+    _shared_initializers = {init.name: numpy_helper.to_array(init) for init in proto.graph.initializer}
+    for arr in _shared_initializers.values():
+        arr.setflags(write=False)
+    del proto
+
+    # Drop the master's own session: workers create theirs after fork
+    voice.session = None
+    shared_mb = sum(arr.nbytes for arr in _shared_initializers.values()) / 1024**2
+    print(f"[Piper] Prepared {len(_shared_initializers)} shared weight tensors ({shared_mb:.1f} MB)")
+
+
+def post_fork():
+    """Called in each worker right after fork."""
+    import onnxruntime
+
+    opts = session_options()
+    # Prepacking would make a private, re-laid-out copy of the weights per worker
+    opts.add_session_config_entry("session.disable_prepacking", "1")
+    keep_alive = []
+    for name, arr in _shared_initializers.items():
+        value = onnxruntime.OrtValue.ortvalue_from_numpy(arr)
+        keep_alive.append(value)  # must outlive the session
+        opts.add_initializer(name, value)
+
+    voice.session = onnxruntime.InferenceSession(
+        loaded_model_path, sess_options=opts, providers=["CPUExecutionProvider"]
+    )
+    voice._shared_ortvalues = keep_alive
+
+
+class TTSRequest(OutputFormatFields):  # + sample_rate / channels / sample_format
     text: str
     language: str = "en"  # Not used by Piper but kept for API compatibility
     speaker_wav: str | None = None  # Not used by Piper but kept for compatibility
@@ -157,6 +241,11 @@ def get_speakers():
 
 @app.post("/tts")
 def tts_endpoint(req: TTSRequest):
+    """WAV in the requested output format (see audio_format.py), default: model native."""
+    return negotiate(synthesize(req), req)
+
+
+def synthesize(req: TTSRequest):
     if voice is None:
         print("[Piper] ERROR: Voice not loaded")
         return create_silent_wav(0.1)
@@ -208,8 +297,8 @@ def tts_endpoint(req: TTSRequest):
         print("[Piper] ERROR: Empty text received")
         return create_silent_wav(0.1)
     
-    # Basic text cleaning
-    text = text.strip()
+    # Basic text cleaning (smart punctuation, emoji, numbers -> words)
+    text = normalize_for_piper(text).text
     if len(text) < 2:
         print("[Piper] ERROR: Text too short")
         return create_silent_wav(0.1)
@@ -378,7 +467,7 @@ def tts_endpoint(req: TTSRequest):
 def create_silent_wav(duration_seconds=0.1):
     """Create a silent WAV file of specified duration"""
     import wave as wave_module
-    sample_rate = 22050  # Piper's default sample rate
+    sample_rate = voice.config.sample_rate if voice is not None else 22050  # match the voice's real audio
     samples = int(sample_rate * duration_seconds)
     
     buffer = io.BytesIO()
@@ -391,6 +480,10 @@ def create_silent_wav(duration_seconds=0.1):
     return Response(content=buffer.getvalue(), media_type="audio/wav")
 
 
+# Binary-framed variant of /tts for local clients (see local_transport.py)
+app.post("/tts/raw")(framed_tts(tts_endpoint, TTSRequest))
+
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8011)
\ No newline at end of file
+    # TCP for Unity + Unix socket for local clients (PiperServerManager runs this)
+    serve_main(app, "piper", 8011)
\ No newline at end of file
@@ -0,0 +1,294 @@
+"""
+Text normalization shared by xtts_server and piper_server.
+
+One str.translate() pass does all per-character work (smart punctuation,
+ASCII folding, control/emoji removal, unsafe symbols -> space), then a few
+precompiled regexes handle numbers, abbreviations and spacing. Word and
+alphanumeric counts are computed once and returned with the text so the
+endpoints don't have to count again. Results are memoized: LLM replies
+repeat a lot ("Hehe!", "Mhm, okay.", the same sentence re-sent on retry).
+
+    from text_normalizer import normalize_for_xtts, normalize_for_piper
+    norm = normalize_for_xtts(text)    # -> Normalized(text, words, alnum)
+"""
+import re
+import unicodedata
+from functools import lru_cache
+from typing import NamedTuple
+
+CACHE_SIZE = 2048
+
+
+class Normalized(NamedTuple):
+    text: str
+    words: int    # words containing at least one letter/digit
+    alnum: int    # alphanumeric characters
+
+
+# ------------------------------
+# Translation tables
+# ------------------------------
+_SMART = {
+    "‘": "'", "’": "'", "‚": "'", "‛": "'", "′": "'", "´": "'",
+    "“": '"', "”": '"', "„": '"', "‟": '"', "″": '"', "«": '"', "»": '"',
+    "—": "-", "–": "-", "‒": "-", "‑": "-", "‐": "-", "−": "-",
+    "…": "...",
+    "\u00a0": " ", "\u2009": " ", "\u200a": " ", "\u202f": " ", "\u3000": " ",
+    # symbols worth saying (numbers with % / $ are expanded before this)
+    "&": " and ", "@": " at ", "+": " plus ", "=": " equals ", "%": " percent ", "°": " degrees ",
+}
+_XTTS_SAFE = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.,!?-'\" ")
+
+
+class _Table(dict):
+    """str.translate table that decides (and remembers) unseen characters on first use."""
+
+    def __init__(self, base: dict, keep_unicode_letters: bool):
+        super().__init__({ord(k): v for k, v in base.items()})
+        self.keep_unicode_letters = keep_unicode_letters
+
+    def __missing__(self, code: int):
+        ch = chr(code)
+        if ch in _XTTS_SAFE:
+            value = ch
+        elif ch in "\t\n\r":
+            value = " "
+        elif code < 128:
+            # other printable ASCII symbols (* # _ ~ ...) -> space, control chars dropped
+            value = " " if ch.isprintable() else None
+        elif ch.isalpha():
+            if self.keep_unicode_letters:
+                value = ch
+            else:
+                # fold accents (é -> e), drop letters with no ASCII form
+                folded = unicodedata.normalize("NFKD", ch).encode("ascii", "ignore").decode("ascii")
+                value = "".join(c for c in folded if c.isalpha()) or None
+        else:
+            value = None  # emoji, symbols
+        self[code] = value
+        return value
+
+
+_XTTS_TABLE = _Table(_SMART, keep_unicode_letters=False)
+_PIPER_TABLE = _Table(_SMART, keep_unicode_letters=True)
+
+# ------------------------------
+# Abbreviations
+# ------------------------------
+_ABBREVIATIONS = {
+    "Dr.": "Doctor", "Mr.": "Mister", "Mrs.": "Missus", "Ms.": "Miss", "St.": None,  # see _street_or_saint
+    "Jr.": "Junior", "Sr.": "Senior", "Prof.": "Professor", "Lt.": "Lieutenant",
+    "vs.": "versus", "etc.": "et cetera", "approx.": "approximately",
+    "e.g.": "for example", "i.e.": "that is", "a.m.": "A M", "p.m.": "P M",
+}
+_ABBREV_RE = re.compile(r"(?<![\w.])(" + "|".join(re.escape(a) for a in _ABBREVIATIONS) + r")(?=[\s,;:!?]|$)")
+_PREV_WORD_RE = re.compile(r"([A-Za-z]+)[\s,]*$")
+_NEXT_WORD_RE = re.compile(r"\s*([A-Za-z]+)")
+
+# ------------------------------
+# Numbers
+# ------------------------------
+_ONES = ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+         "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen", "seventeen", "eighteen", "nineteen"]
+_TENS = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
+_SCALES = [(10**12, "trillion"), (10**9, "billion"), (10**6, "million"), (1000, "thousand")]
+_ORDINALS = {"one": "first", "two": "second", "three": "third", "five": "fifth",
+             "eight": "eighth", "nine": "ninth", "twelve": "twelfth"}
+
+# a "-" is a minus sign only where it can't be a dash/range ("5-10", "555-1234").
+# At most 15 digits (int() refuses huge runs), and no dotted versions ("1.2.3").
+_NUMBER_RE = re.compile(
+    r"(?<![\w.])(?<!\d,)(-)?(\$)?(\d{1,3}(?:,\d{3}){1,4}|\d{1,15})(?!\d|,\d)(?:\.(\d+))?(?!\.\d)"
+    r"(%|st\b|nd\b|rd\b|th\b|(?<=0)'?s\b)?"
+)
+# longer digit runs (IDs, keys) are read digit by digit
+_LONG_DIGITS_RE = re.compile(r"\d{1,3}(?:,\d{3}){5,}|\d{16,}")
+# phone numbers are read digit by digit: "555-1234", "(555) 555-1234"
+_PHONE_RE = re.compile(r"(?<![\w.-])(?:\(\d{3}\) ?|\d{3}-)?\d{3}-\d{4}(?![\w-])")
+# a bare 4-digit number is only read as a year right after one of these words
+_YEAR_CUES = {
+    "in", "since", "of", "from", "by", "until", "till", "before", "after", "around", "circa",
+    "year", "back", "early", "late", "mid", "summer", "winter", "spring", "autumn", "fall",
+    "january", "february", "march", "april", "may", "june", "july", "august",
+    "september", "october", "november", "december",
+}
+
+# ------------------------------
+# Spacing / punctuation cleanup
+# ------------------------------
+_SPACES_RE = re.compile(r" {2,}")
+_PUNCT_RUN_RE = re.compile(r"[.,!?]{2,}")
+_SPACED_PUNCT_RE = re.compile(r" [.,!?] ")
+
+
+def number_to_words(n: int) -> str:
+    if n < 20:
+        return _ONES[n]
+    if n < 100:
+        tens, ones = divmod(n, 10)
+        return _TENS[tens] + (f"-{_ONES[ones]}" if ones else "")
+    if n < 1000:
+        hundreds, rest = divmod(n, 100)
+        return f"{_ONES[hundreds]} hundred" + (f" {number_to_words(rest)}" if rest else "")
+    for value, name in _SCALES:
+        if n >= value:
+            if n >= value * 1000:
+                break  # beyond trillions: read digit by digit
+            major, rest = divmod(n, value)
+            return f"{number_to_words(major)} {name}" + (f" {number_to_words(rest)}" if rest else "")
+    return " ".join(_ONES[int(d)] for d in str(n))
+
+
+def _ordinal(words: str) -> str:
+    head, _, last = words.rpartition(" ")
+    prefix, dash, unit = last.rpartition("-")
+    if unit in _ORDINALS:
+        unit = _ORDINALS[unit]
+    elif unit.endswith("y"):
+        unit = unit[:-1] + "ieth"
+    else:
+        unit += "th"
+    last = prefix + dash + unit
+    return f"{head} {last}" if head else last
+
+
+def _year(n: int) -> str | None:
+    """1999 -> nineteen ninety-nine, 2024 -> twenty twenty-four (2000-2009 read normally)."""
+    if 1100 <= n <= 2099 and not 2000 <= n <= 2009:
+        high, low = divmod(n, 100)
+        if low == 0:
+            return f"{number_to_words(high)} hundred"
+        return f"{number_to_words(high)} {'oh ' if low < 10 else ''}{number_to_words(low)}"
+    return None
+
+
+def _prev_word(text: str, end: int) -> str:
+    m = _PREV_WORD_RE.search(text, max(0, end - 24), end)
+    return m.group(1) if m else ""
+
+
+def _street_or_saint(m: re.Match) -> str:
+    """'Main St.' -> Street, 'St. Louis' / 'visit St. Patrick' -> Saint."""
+    prev = _prev_word(m.string, m.start())
+    nxt = _NEXT_WORD_RE.match(m.string, m.end())
+    if prev[:1].isupper() and not (nxt and nxt.group(1)[:1].isupper()):
+        return "Street"
+    return "Saint"
+
+
+def _digits(digits: str) -> str:
+    return " ".join(_ONES[int(d)] for d in digits)
+
+
+def _plural(words: str) -> str:
+    """nineteen ninety -> nineteen nineties, eighty -> eighties."""
+    return words[:-1] + "ies" if words.endswith("y") else words + "s"
+
+
+def _dollars(n: int, decimals: str | None) -> str:
+    """$1.5 -> one dollar and fifty cents, $0.01 -> one cent, $2.505 -> two point five zero five dollars."""
+    if decimals and len(decimals) > 2:
+        return f"{number_to_words(n)} point {_digits(decimals)} dollars"
+    cents = int(decimals.ljust(2, "0")) if decimals else 0
+    words = f"{number_to_words(n)} dollar{'s' if n != 1 else ''}"
+    if not cents:
+        return words
+    cents = f"{number_to_words(cents)} cent{'s' if cents != 1 else ''}"
+    return f"{words} and {cents}" if n else cents
+
+
+def _expand_phone(m: re.Match) -> str:
+    groups = re.findall(r"\d+", m.group(0))
+    return ", ".join(_digits(g) for g in groups)
+
+
+def _expand_abbreviation(m: re.Match) -> str:
+    return _ABBREVIATIONS[m.group(1)] or _street_or_saint(m)
+
+
+def _expand_number(m: re.Match) -> str:
+    words = _number_words(m)
+    # keep "5pm" -> "five pm" apart, without adding space before punctuation
+    return words + " " if m.string[m.end():m.end() + 1].isalnum() else words
+
+
+def _number_words(m: re.Match) -> str:
+    minus, dollar, integer, decimals, suffix = m.groups()
+    n = int(integer.replace(",", ""))
+    text = m.string
+
+    if suffix in ("st", "nd", "rd", "th") and not decimals:
+        return _ordinal(number_to_words(n))
+
+    minus = "minus " if minus else ""
+
+    if dollar:
+        return minus + _dollars(n, decimals)
+
+    if decimals:
+        words = f"{number_to_words(n)} point {_digits(decimals)}"
+    elif suffix and suffix.endswith("s"):
+        # decades: 1990s / 1990's -> nineteen nineties, 90s -> nineties
+        return minus + _plural(_year(n) if len(integer) == 4 and _year(n) else number_to_words(n))
+    elif (not minus and "," not in integer and len(integer) == 4 and suffix is None
+          and _prev_word(text, m.start()).lower() in _YEAR_CUES):
+        words = _year(n) or number_to_words(n)
+    else:
+        words = number_to_words(n)
+
+    if suffix == "%":
+        words += " percent"
+    return minus + words
+
+
+def _expand(text: str) -> str:
+    text = _ABBREV_RE.sub(_expand_abbreviation, text)
+    text = _PHONE_RE.sub(_expand_phone, text)
+    text = _LONG_DIGITS_RE.sub(lambda m: _digits(m.group(0).replace(",", "")), text)
+    return _NUMBER_RE.sub(_expand_number, text)
+
+
+def _normalize_xtts(text: str) -> Normalized:
+    """
+    Aggressive cleanup to prevent XTTS CUDA indexing errors: ASCII letters,
+    digits and basic punctuation only, at least two real words.
+    """
+    text = text.strip()
+    if not text:
+        return Normalized("", 0, 0)
+
+    text = _expand(text).translate(_XTTS_TABLE)
+    text = _SPACES_RE.sub(" ", text)
+    text = _PUNCT_RUN_RE.sub(".", text)
+    text = _SPACED_PUNCT_RE.sub(". ", text)
+    text = text.strip(" .,!?;:-")
+
+    # Keep only words with real content, trimmed of edge punctuation
+    words = [w.strip(".,!?") for w in text.split(" ") if any(c.isalnum() for c in w)]
+    if len(words) < 2:
+        return Normalized("", len(words), 0)
+
+    text = " ".join(words)
+    if len(text) < 5:
+        return Normalized("", len(words), 0)
+    return Normalized(text, len(words), sum(c.isalnum() for c in text))
+
+
+def _normalize_piper(text: str) -> Normalized:
+    """Lighter cleanup for Piper: keeps non-ASCII letters, no minimum length."""
+    text = _expand(text.strip()).translate(_PIPER_TABLE)
+    text = _SPACES_RE.sub(" ", text)
+    text = _PUNCT_RUN_RE.sub(lambda m: "..." if m.group(0).startswith("..") else m.group(0)[0], text)
+    text = text.strip()
+    words = sum(1 for w in text.split(" ") if any(c.isalnum() for c in w))
+    return Normalized(text, words, sum(c.isalnum() for c in text))
+
+
+normalize_for_xtts = lru_cache(maxsize=CACHE_SIZE)(_normalize_xtts)
+normalize_for_piper = lru_cache(maxsize=CACHE_SIZE)(_normalize_piper)
+
+
+def count_words(text: str) -> Normalized:
+    """Counts for text that was already normalized but changed afterwards (e.g. truncated)."""
+    words = sum(1 for w in text.split() if any(c.isalnum() for c in w))
+    return Normalized(text, words, sum(c.isalnum() for c in text))
@@ -0,0 +1,239 @@
+"""
+Overload-aware TTS router: XTTS first, Piper when XTTS can't keep up.
+
+Same /tts contract as xtts_server (text, language, speaker_wav and the
+optional output format, which Piper chunks are converted to as well). For
+every chunk the router estimates how long XTTS would take (current XTTS
+queue depth x recent job latency + recent seconds-per-char x this chunk).
+If that breaks the latency SLO, or XTTS answers with a failure silence, the
+chunk is served by Piper instead: the voice gets worse but the conversation
+keeps moving. Latency samples expire after SAMPLE_TTL_SEC, the first (cold)
+XTTS generation is not sampled, and while chunks go to Piper an idle XTTS
+is re-measured in the background, so one slow call can't pin Piper for good.
+
+Routing decision is reported in the X-TTS-Engine / X-TTS-Route-Reason
+response headers and in GET /metrics.
+
+Both engines are loaded in-process. Standalone (from StreamingAssets/TTS):
+  PYTHONPATH=.. python -m uvicorn tts_router:app --host 127.0.0.1 --port 8010
+or as the "router" engine of speech_gateway (-> /router/tts).
+"""
+import os
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+
+import xtts_server
+import piper_server
+from local_transport import percentile
+
+app = FastAPI()
+
+# ------------------------------
+# ROUTING CONFIG
+# ------------------------------
+XTTS_LATENCY_SLO_SEC = float(os.environ.get("TTS_ROUTER_SLO_SEC", "4.0"))  # max expected time for one chunk
+XTTS_MAX_QUEUE_DEPTH = int(os.environ.get("TTS_ROUTER_MAX_QUEUE", "3"))     # hard cap on waiting/running XTTS jobs
+LATENCY_WINDOW = 20                 # recent XTTS jobs used for the estimate
+SAMPLE_TTL_SEC = 60.0               # older XTTS samples no longer count (one stall can't pin Piper)
+PROBE_INTERVAL_SEC = 15.0           # re-measure XTTS in the background when it's idle and samples are this old
+PROBE_TEXT = "Just checking that my voice still works."
+PIPER_SPEAKER_ID = 0                # Piper voice used for degraded chunks
+PIPER_LENGTH_SCALE = None           # None = Piper default speech rate
+
+# XTTS silences that mean "the model failed", worth retrying on Piper.
+# Input rejections (empty text, too few words...) are NOT retried: Piper would
+# only speak the same junk text.
+XTTS_FAILURE_REASONS = {
+    "no_speaker", "speaker_not_found", "model_index_error", "model_error",
+    "empty_audio", "index_error", "runtime_error", "unexpected_error",
+}
+
+
+@asynccontextmanager
+async def _no_gate(engine: str):
+    yield
+
+# Async context manager factory taking the engine name ("xtts" / "piper").
+# speech_gateway replaces this with its ComputeScheduler.slot so routed
+# jobs share the gateway's compute budget.
+engine_gate = _no_gate
+
+# Optional callable engine name -> jobs waiting + running on that engine.
+# speech_gateway sets it to ComputeScheduler.load so XTTS jobs that come in
+# through /xtts/tts (not via the router) count towards the queue depth too.
+engine_load = None
+
+
+class RouterStats:
+    def __init__(self):
+        self.xtts_depth = 0                                  # router's own XTTS jobs queued or running
+        self.xtts_samples = deque(maxlen=LATENCY_WINDOW)     # (time, seconds per job, seconds per char)
+        self.xtts_warm = False                               # first generation (CUDA init) is not a sample
+        self.probing = False
+        self.probe_task = None                               # keeps the background probe referenced
+        self.probes = 0
+        self.piper_latency = deque(maxlen=LATENCY_WINDOW)
+        self.routed = {"xtts": 0, "piper": 0}
+        self.reasons = {}
+
+    def depth(self) -> int:
+        """XTTS jobs waiting or running, including direct /xtts/tts calls when gated."""
+        if engine_load is not None:
+            return max(self.xtts_depth, engine_load("xtts"))
+        return self.xtts_depth
+
+    def add_xtts_sample(self, job_sec: float, text_len: int):
+        if not self.xtts_warm:
+            self.xtts_warm = True
+            return
+        self.xtts_samples.append((time.monotonic(), job_sec, job_sec / max(1, text_len)))
+
+    def fresh_samples(self) -> list:
+        cutoff = time.monotonic() - SAMPLE_TTL_SEC
+        return [sample for sample in self.xtts_samples if sample[0] >= cutoff]
+
+    def last_sample_age(self) -> float | None:
+        return time.monotonic() - self.xtts_samples[-1][0] if self.xtts_samples else None
+
+    def estimate_xtts_sec(self, text_len: int) -> float | None:
+        samples = self.fresh_samples()
+        if not samples:
+            return None  # no recent data, trust XTTS
+        avg_job = sum(s[1] for s in samples) / len(samples)
+        per_char = sum(s[2] for s in samples) / len(samples)
+        return self.depth() * avg_job + per_char * text_len
+
+    def record(self, engine: str, reason: str):
+        self.routed[engine] += 1
+        self.reasons[reason] = self.reasons.get(reason, 0) + 1
+
+
+stats = RouterStats()
+
+
+def choose_engine(text: str) -> tuple[str, str, float | None]:
+    """Returns (engine, reason, estimated_xtts_sec)."""
+    if stats.depth() >= XTTS_MAX_QUEUE_DEPTH:
+        return "piper", "xtts_queue_full", None
+
+    estimate = stats.estimate_xtts_sec(len(text))
+    if estimate is not None and estimate > XTTS_LATENCY_SLO_SEC:
+        return "piper", "xtts_slo", estimate
+
+    return "xtts", "ok", estimate
+
+
+async def _run_xtts(req: xtts_server.TTSRequest):
+    """XTTS job through the gate; real generations feed the latency window."""
+    stats.xtts_depth += 1
+    try:
+        async with engine_gate("xtts"):
+            # time the generation only; queue wait is covered by the depth
+            t0 = time.perf_counter()
+            response = await run_in_threadpool(xtts_server.tts_endpoint, req)
+            dt = time.perf_counter() - t0
+    finally:
+        stats.xtts_depth -= 1
+
+    if response.headers.get("X-TTS-Silence") is None:
+        stats.add_xtts_sample(dt, len((req.text or "").strip()))
+    return response
+
+
+async def _probe_xtts():
+    try:
+        stats.probes += 1
+        response = await _run_xtts(xtts_server.TTSRequest(text=PROBE_TEXT))
+        print(f"[Router] XTTS probe done (silence={response.headers.get('X-TTS-Silence')}), "
+              f"estimate now {stats.estimate_xtts_sec(len(PROBE_TEXT))}")
+    except Exception as e:
+        print(f"[Router] XTTS probe failed: {type(e).__name__}: {e}")
+    finally:
+        stats.probing = False
+
+
+def maybe_probe_xtts():
+    """
+    Chunks routed to Piper never produce XTTS samples, so the estimate could
+    only change by expiring. When XTTS is idle and the newest sample is
+    stale, re-measure it in the background (the current chunk stays on Piper).
+    """
+    age = stats.last_sample_age()
+    if stats.probing or stats.depth() > 0 or age is None or age < PROBE_INTERVAL_SEC:
+        return
+    stats.probing = True
+    stats.probe_task = asyncio.get_running_loop().create_task(_probe_xtts())
+
+
+async def _run_piper(req: xtts_server.TTSRequest):
+    piper_req = piper_server.TTSRequest(
+        text=req.text,
+        language=req.language,
+        speaker_id=PIPER_SPEAKER_ID,
+        length_scale=PIPER_LENGTH_SCALE,
+        # same output format as XTTS would have returned
+        sample_rate=req.sample_rate,
+        channels=req.channels,
+        sample_format=req.sample_format,
+    )
+    t0 = time.perf_counter()
+    async with engine_gate("piper"):
+        response = await run_in_threadpool(piper_server.tts_endpoint, piper_req)
+    stats.piper_latency.append(time.perf_counter() - t0)
+    return response
+
+
+@app.post("/tts")
+async def tts_endpoint(req: xtts_server.TTSRequest):
+    text = (req.text or "").strip()
+    engine, reason, estimate = choose_engine(text)
+
+    if engine == "xtts":
+        response = await _run_xtts(req)
+        silence = response.headers.get("X-TTS-Silence")
+        if silence in XTTS_FAILURE_REASONS:
+            engine, reason = "piper", f"xtts_failed:{silence}"
+    elif reason == "xtts_slo":
+        maybe_probe_xtts()
+
+    if engine == "piper":
+        est = f"{estimate:.2f}s" if estimate is not None else "n/a"
+        print(f"[Router] Using Piper ({reason}, xtts_estimate={est}, slo={XTTS_LATENCY_SLO_SEC}s)")
+        response = await _run_piper(req)
+
+    stats.record(engine, reason)
+    response.headers["X-TTS-Engine"] = engine
+    response.headers["X-TTS-Route-Reason"] = reason
+    return response
+
+
+@app.get("/metrics")
+def metrics():
+    return {
+        "slo_sec": XTTS_LATENCY_SLO_SEC,
+        "max_queue_depth": XTTS_MAX_QUEUE_DEPTH,
+        "xtts_queue_depth": stats.depth(),
+        "routed": stats.routed,
+        "reasons": stats.reasons,
+        "xtts_probes": stats.probes,
+        "xtts_fresh_samples": len(stats.fresh_samples()),
+        "xtts_latency_p50": percentile([s[1] for s in stats.xtts_samples], 0.5, 3),
+        "xtts_latency_p95": percentile([s[1] for s in stats.xtts_samples], 0.95, 3),
+        "piper_latency_p50": percentile(stats.piper_latency, 0.5, 3),
+        "piper_latency_p95": percentile(stats.piper_latency, 0.95, 3),
+    }
+
+
+@app.get("/health")
+def health_check():
+    xtts_loaded = getattr(xtts_server, "tts", None) is not None
+    piper_loaded = piper_server.voice is not None
+    return {
+        "status": "healthy" if xtts_loaded and piper_loaded else "degraded",
+        "xtts_loaded": xtts_loaded,
+        "piper_loaded": piper_loaded,
+    }
@@ -5,7 +5,6 @@ import torch
 import soundfile as sf
 from fastapi import FastAPI
 from fastapi.responses import Response, JSONResponse
-from pydantic import BaseModel
 from TTS.api import TTS
 
 app = FastAPI()
@@ -38,66 +37,29 @@ SUPPORTED_LANGUAGES = ["en", "es", "fr", "de", "it", "pt", "pl", "tr", "ru", "nl
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+from local_transport import framed_tts, serve_main
+from audio_format import OutputFormatFields, negotiate
+from text_normalizer import normalize_for_xtts, count_words
+
 # Put your default wav here:
 # E:\Unity Projects\Kihbbi.AI\Assets\StreamingAssets\TTS\speaker.wav
 DEFAULT_SPEAKER_WAV = os.path.join(BASE_DIR, "speaker.wav")
 
 
-class TTSRequest(BaseModel):
+class TTSRequest(OutputFormatFields):  # + sample_rate / channels / sample_format
     text: str
     language: str = "en"
     speaker_wav: str | None = None
 
 
-def sanitize_text(text: str) -> str:
+def silent_wav(samples: int = 2400, reason: str = "error") -> Response:
     """
-    Aggressive text sanitization to prevent CUDA indexing errors.
-    The indexing errors are often caused by unusual character combinations.
+    Short silent WAV returned instead of an error so the client flow doesn't break.
+    The X-TTS-Silence header tells callers (e.g. tts_router) this is a fallback, not speech.
     """
-    if not text or not text.strip():
-        return ""
-    
-    # First pass: Remove problematic characters that cause CUDA errors
-    text = text.strip()
-    
-    # Remove smart quotes and replace with regular quotes
-    text = text.replace('"', '"').replace('"', '"').replace("'", "'").replace("'", "'")
-    
-    # Remove em dashes, en dashes and replace with regular hyphens
-    text = text.replace('—', '-').replace('–', '-')
-    
-    # Remove ellipsis and replace with three dots
-    text = text.replace('…', '...')
-    
-    # Convert to ASCII and remove non-printable characters
-    text = text.encode('ascii', 'ignore').decode('ascii')
-    text = ''.join(c for c in text if c.isprintable() or c in ' \n\r\t')
-    
-    # Keep only safe characters (letters, numbers, basic punctuation)
-    # This is more restrictive to prevent CUDA indexing errors
-    text = re.sub(r'[^a-zA-Z0-9\s.,!?\-\'\" ]', ' ', text)
-    
-    # Clean up multiple spaces and punctuation
-    text = re.sub(r'\s+', ' ', text)  # Multiple spaces -> single space
-    text = re.sub(r'[.,!?]{2,}', '.', text)  # Multiple punctuation -> single
-    text = re.sub(r'\s+[.,!?]\s+', '. ', text)  # Space around punctuation
-    
-    # Remove leading/trailing punctuation and whitespace
-    text = text.strip(' .,!?;:-')
-    
-    # Ensure we have meaningful content
-    words = [word.strip('.,!?') for word in text.split() if any(c.isalnum() for c in word)]
-    if len(words) < 2:
-        return ""
-    
-    # Reconstruct with safe spacing
-    text = ' '.join(words)
-    
-    # Final length check
-    if len(text) < 5 or len(text) > 200:  # Keep reasonable bounds
-        return ""
-    
-    return text
+    buf = io.BytesIO()
+    sf.write(buf, [0.0] * samples, 24000, format="WAV")
+    return Response(content=buf.getvalue(), media_type="audio/wav", headers={"X-TTS-Silence": reason})
 
 
 def resolve_speaker_path(speaker_wav: str | None) -> str | None:
@@ -131,39 +93,34 @@ def resolve_speaker_path(speaker_wav: str | None) -> str | None:
 
 @app.post("/tts")
 def tts_endpoint(req: TTSRequest):
+    """WAV in the requested output format (see audio_format.py), default: model native."""
+    return negotiate(synthesize(req), req)
+
+
+def synthesize(req: TTSRequest):
     text = (req.text or "").strip()
     print(f"[XTTS] === NEW REQUEST ===")
     print(f"[XTTS] Raw input text: '{text}' (length: {len(text)})")
     
     if not text:
         print("[XTTS] ERROR: Empty text received")
-        buf = io.BytesIO()
-        sf.write(buf, [0.0] * 2400, 24000, format="WAV")
-        return Response(content=buf.getvalue(), media_type="audio/wav")
+        return silent_wav(2400, "empty_text")
 
-    # Sanitize text to prevent CUDA errors
+    # Sanitize text to prevent CUDA errors (also expands numbers/abbreviations)
     original_text = text
-    text = sanitize_text(text)
+    norm = normalize_for_xtts(text)
+    text = norm.text
     
     print(f"[XTTS] Original: '{original_text}'")
     print(f"[XTTS] Sanitized: '{text}' (length: {len(text)})")
     
     # Reject if empty or too short after sanitization
-    if not text or len(text.strip()) < 5:
+    if not text:
         print(f"[XTTS] ERROR: Text too short or empty after sanitization. Original: '{original_text[:100]}'")
-        print(f"[XTTS] Sanitized result: '{text}'")
         # Return empty wav instead of error to avoid breaking the flow
-        buf = io.BytesIO()
-        sf.write(buf, [0.0] * 2400, 24000, format="WAV")
-        return Response(content=buf.getvalue(), media_type="audio/wav")
-    
-    # Additional validation: ensure we have meaningful content
-    words = [word for word in text.split() if any(c.isalnum() for c in word)]
-    if len(words) < 2:
-        print(f"[XTTS] ERROR: Not enough meaningful words. Text: '{text}' -> {len(words)} words")
-        buf = io.BytesIO()
-        sf.write(buf, [0.0] * 2400, 24000, format="WAV")
-        return Response(content=buf.getvalue(), media_type="audio/wav")
+        if 0 < norm.words < 2:
+            return silent_wav(2400, "too_few_words")
+        return silent_wav(2400, "empty_after_sanitize")
 
     # Validate language
     lang = req.language.lower()
@@ -176,12 +133,11 @@ def tts_endpoint(req: TTSRequest):
     if len(text) > MAX_LENGTH:
         print(f"[XTTS] WARNING: Text too long ({len(text)} chars), truncating to {MAX_LENGTH}")
         text = text[:MAX_LENGTH].rsplit(' ', 1)[0]  # Cut at word boundary
+        norm = count_words(text)
         # Ensure we still have meaningful content after truncation
         if len(text.strip()) < 10:
             print("[XTTS] ERROR: Text too short after truncation")
-            buf = io.BytesIO()
-            sf.write(buf, [0.0] * 2400, 24000, format="WAV")
-            return Response(content=buf.getvalue(), media_type="audio/wav")
+            return silent_wav(2400, "too_short_after_truncation")
 
     speaker = resolve_speaker_path(req.speaker_wav)
 
@@ -195,15 +151,11 @@ def tts_endpoint(req: TTSRequest):
     if not speaker:
         print("[XTTS] ERROR: No valid speaker wav found. Returning empty wav.")
         # Return empty wav
-        buf = io.BytesIO()
-        sf.write(buf, [0.0] * 2400, 24000, format="WAV")  # 0.1 sec silence
-        return Response(content=buf.getvalue(), media_type="audio/wav")
+        return silent_wav(2400, "no_speaker")
     
     if not os.path.isfile(speaker):
         print(f"[XTTS] ERROR: Speaker file does not exist: {speaker}")
-        buf = io.BytesIO()
-        sf.write(buf, [0.0] * 2400, 24000, format="WAV")
-        return Response(content=buf.getvalue(), media_type="audio/wav")
+        return silent_wav(2400, "speaker_not_found")
 
     # Final validation before TTS generation
     try:
@@ -211,24 +163,20 @@ def tts_endpoint(req: TTSRequest):
         if not text.strip():
             raise ValueError("Text is empty or whitespace only")
             
-        # Ensure we have alphanumeric characters
-        alphanumeric_count = sum(c.isalnum() for c in text)
-        if alphanumeric_count < 5:
-            raise ValueError(f"Not enough alphanumeric characters ({alphanumeric_count})")
+        # Ensure we have alphanumeric characters (counted once by the normalizer)
+        if norm.alnum < 5:
+            raise ValueError(f"Not enough alphanumeric characters ({norm.alnum})")
             
         # Ensure we have actual words
-        word_count = len([w for w in text.split() if any(c.isalnum() for c in w)])
-        if word_count < 2:
-            raise ValueError(f"Not enough words ({word_count})")
+        if norm.words < 2:
+            raise ValueError(f"Not enough words ({norm.words})")
             
-        print(f"[XTTS] Final validation passed: {alphanumeric_count} chars, {word_count} words")
+        print(f"[XTTS] Final validation passed: {norm.alnum} chars, {norm.words} words")
         
     except ValueError as ve:
         print(f"[XTTS] Pre-generation validation failed: {ve}")
         print(f"[XTTS] Problematic text: '{text}'")
-        buf = io.BytesIO()
-        sf.write(buf, [0.0] * 2400, 24000, format="WAV")
-        return Response(content=buf.getvalue(), media_type="audio/wav")
+        return silent_wav(2400, "validation_failed")
 
     # Generate with proper CUDA memory management
     try:
@@ -298,22 +246,16 @@ def tts_endpoint(req: TTSRequest):
                 print(f"[XTTS] Length: {len(text)}")
                 print(f"[XTTS] Language: {lang}")
                 # Return silence instead of propagating the error
-                buf = io.BytesIO()
-                sf.write(buf, [0.0] * 4800, 24000, format="WAV")  # 0.2 sec silence
-                return Response(content=buf.getvalue(), media_type="audio/wav")
+                return silent_wav(4800, "model_index_error")
             
             except Exception as model_err:
                 print(f"[XTTS] Model error: {type(model_err).__name__}: {model_err}")
                 print(f"[XTTS] Text that caused error: '{text}'")
-                buf = io.BytesIO()
-                sf.write(buf, [0.0] * 4800, 24000, format="WAV")  # 0.2 sec silence
-                return Response(content=buf.getvalue(), media_type="audio/wav")
+                return silent_wav(4800, "model_error")
 
         if wav is None or len(wav) == 0:
             print("[XTTS] ERROR: TTS returned empty audio")
-            buf = io.BytesIO()
-            sf.write(buf, [0.0] * 2400, 24000, format="WAV")
-            return Response(content=buf.getvalue(), media_type="audio/wav")
+            return silent_wav(2400, "empty_audio")
 
         # Check for silent audio (all values near zero)
         max_amplitude = max(abs(sample) for sample in wav) if len(wav) > 0 else 0
@@ -334,9 +276,7 @@ def tts_endpoint(req: TTSRequest):
         print(f"[XTTS] Language: {lang}")
         print(f"[XTTS] Speaker: {speaker}")
         # Return silent WAV
-        buf = io.BytesIO()
-        sf.write(buf, [0.0] * 2400, 24000, format="WAV")
-        return Response(content=buf.getvalue(), media_type="audio/wav")
+        return silent_wav(2400, "index_error")
     
     except RuntimeError as e:
         error_msg = str(e)
@@ -346,14 +286,19 @@ def tts_endpoint(req: TTSRequest):
         print(f"[XTTS] Speaker: {speaker}")
         
         # Return silent WAV instead of 500 error
-        buf = io.BytesIO()
-        sf.write(buf, [0.0] * 2400, 24000, format="WAV")
-        return Response(content=buf.getvalue(), media_type="audio/wav")
+        return silent_wav(2400, "runtime_error")
     
     except Exception as e:
         print(f"[XTTS] Unexpected error: {type(e).__name__}: {e}")
         print(f"[XTTS] Text that caused error: '{text}'")
         # Return silent WAV instead of crashing
-        buf = io.BytesIO()
-        sf.write(buf, [0.0] * 2400, 24000, format="WAV")
-        return Response(content=buf.getvalue(), media_type="audio/wav")
+        return silent_wav(2400, "unexpected_error")
+
+
+# Binary-framed variant of /tts for local clients (see local_transport.py)
+app.post("/tts/raw")(framed_tts(tts_endpoint, TTSRequest))
+
+
+if __name__ == "__main__":
+    # TCP for Unity + Unix socket for local clients (XTTSServerManager runs this)
+    serve_main(app, "xtts", 8010)
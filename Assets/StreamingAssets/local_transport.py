@@ -0,0 +1,234 @@
+"""
+Local transport shared by the STT/TTS servers.
+
+1) Binary framing for the high-frequency per-sentence calls, next to the
+   JSON / multipart API:
+
+     [u32 little-endian header length][UTF-8 JSON header][raw payload]
+
+   STT request:  header {"sample_rate", "channels", "sample_format"} + PCM
+   TTS request:  header = the usual TTSRequest fields, no payload
+   TTS response: header {"sample_rate", "channels", "sample_format", "frames"} + PCM
+   STT response: header = the usual /stt JSON, no payload
+
+   No multipart parsing, no base64, no WAV container to walk on the client.
+
+2) serve(): one uvicorn server listening on TCP AND a Unix domain socket
+   (where the OS supports AF_UNIX), so local clients skip loopback TCP.
+   serve_main() is the servers' `python <server>.py` entry point, which the
+   Unity *ServerManager scripts launch. CPython on Windows has no AF_UNIX:
+   there it is TCP only, same as `-m uvicorn`.
+
+Unity's STTClient posts its float mic samples to /stt/raw over TCP. The TTS
+clients keep the JSON / WAV routes: a WAV reply is one body behind a fixed
+44-byte header, so framing saves nothing there. The socket is for local
+Python clients (UnixHTTPConnection below, Tools/bench_transport.py).
+
+The servers import this module from StreamingAssets: the *ServerManager
+scripts put it on PYTHONPATH, speech_gateway.py and serve_workers.py live
+there. By hand, from TTS/ or STT/:  PYTHONPATH=.. python piper_server.py
+"""
+import io
+import os
+import json
+import argparse
+import wave
+import struct
+import socket
+import tempfile
+import http.client
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+
+FRAME_MEDIA_TYPE = "application/x-kihbbi-frame"
+_LEN = struct.Struct("<I")
+
+SAMPLE_WIDTHS = {"int16": 2, "float32": 4}
+# WAV fmt tag (1 = PCM, 3 = IEEE float) and bits per sample for each sample_format
+WAV_FORMATS = {"int16": (1, 16), "float32": (3, 32)}
+_WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+
+class FrameError(ValueError):
+    pass
+
+
+def encode_frame(header: dict, payload: bytes = b"") -> bytes:
+    head = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    return b"".join((_LEN.pack(len(head)), head, payload))
+
+
+def decode_frame(data: bytes) -> tuple[dict, memoryview]:
+    if len(data) < _LEN.size:
+        raise FrameError("Frame too short")
+    (head_len,) = _LEN.unpack_from(data)
+    end = _LEN.size + head_len
+    if end > len(data):
+        raise FrameError(f"Header length {head_len} exceeds frame size {len(data)}")
+    header = json.loads(data[_LEN.size:end])
+    if not isinstance(header, dict):
+        raise FrameError("Frame header must be a JSON object")
+    return header, memoryview(data)[end:]
+
+
+class FrameResponse(Response):
+    media_type = FRAME_MEDIA_TYPE
+
+    def __init__(self, header: dict, payload: bytes = b"", status_code: int = 200, headers: dict | None = None):
+        super().__init__(content=encode_frame(header, payload), status_code=status_code, headers=headers)
+
+
+def wav_header(sample_rate: int, channels: int, sample_format: str, data_len: int) -> bytes:
+    """Canonical 44-byte RIFF header (the Unity WAV readers expect data at offset 44)."""
+    tag, bits = WAV_FORMATS[sample_format]
+    block = channels * bits // 8
+    return _WAV_HEADER.pack(b"RIFF", 36 + data_len, b"WAVE", b"fmt ", 16, tag, channels,
+                            sample_rate, sample_rate * block, block, bits, b"data", data_len)
+
+
+def parse_wav(data: bytes) -> tuple[dict, memoryview]:
+    """
+    Minimal RIFF reader for the WAVs the TTS servers produce: int16 PCM or
+    float32 (the wave module can't read the latter). Returns
+    ({"sample_rate", "channels", "sample_format"}, pcm).
+    """
+    view = memoryview(data)
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise FrameError("Not a RIFF/WAVE file")
+    fmt, pos = None, 12
+    while pos + 8 <= len(data):
+        chunk_id, size = data[pos:pos + 4], struct.unpack_from("<I", data, pos + 4)[0]
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            tag, channels, rate, _, _, bits = struct.unpack_from("<HHIIHH", data, body)
+            if tag == 0xFFFE and size >= 26:  # WAVE_FORMAT_EXTENSIBLE: real tag in the subformat GUID
+                tag = struct.unpack_from("<H", data, body + 24)[0]
+            fmt = next((name for name, tb in WAV_FORMATS.items() if tb == (tag, bits)), None)
+            if fmt is None:
+                raise FrameError(f"Unsupported WAV encoding (format tag {tag}, {bits} bits)")
+            header = {"sample_rate": rate, "channels": channels, "sample_format": fmt}
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise FrameError("WAV data chunk before fmt chunk")
+            # clamp: streamed writers may leave the size at 0xFFFFFFFF
+            return header, view[body:min(body + size, len(data))]
+        pos = body + size + (size & 1)
+    raise FrameError("WAV data chunk not found")
+
+
+def wav_to_frame(response: Response) -> FrameResponse:
+    """Turn a WAV Response from a /tts endpoint into a framed raw-PCM response."""
+    header, pcm = parse_wav(response.body)
+    header["frames"] = len(pcm) // (SAMPLE_WIDTHS[header["sample_format"]] * header["channels"])
+
+    # Keep the engine's own metadata (X-TTS-Silence, X-TTS-Engine, ...)
+    extra = {k: v for k, v in response.headers.items() if k.lower().startswith("x-tts")}
+    for k, v in extra.items():
+        header[k.lower()[2:].replace("-", "_")] = v
+    return FrameResponse(header, pcm, headers=extra)
+
+
+def framed_tts(endpoint, request_model):
+    """
+    /tts/raw handler for a server whose /tts endpoint(req) returns a WAV Response:
+
+        app.post("/tts/raw")(framed_tts(tts_endpoint, TTSRequest))
+    """
+    async def tts_raw(request: Request):
+        """Binary-framed TTS (see local_transport.py): TTSRequest header in, raw PCM frame out."""
+        try:
+            header, _ = decode_frame(await request.body())
+            req = request_model(**header)
+        except (FrameError, ValueError) as e:
+            return FrameResponse({"error": str(e)}, status_code=400)
+
+        return wav_to_frame(await run_in_threadpool(endpoint, req))
+
+    return tts_raw
+
+
+def percentile(values, pct: float, ndigits: int | None = None) -> float | None:
+    """Nearest-rank percentile (pct in 0..1) for /stats and the Tools benchmarks; None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    value = ordered[min(len(ordered) - 1, int(pct * len(ordered)))]
+    return value if ndigits is None else round(value, ndigits)
+
+
+def pcm_to_wav(pcm, sample_rate: int, channels: int, sample_format: str) -> io.BytesIO:
+    """Wrap framed PCM in an in-memory WAV (for decoders that want a container)."""
+    if sample_rate <= 0 or channels < 1:
+        raise FrameError(f"Invalid sample_rate={sample_rate} / channels={channels}")
+    width = SAMPLE_WIDTHS.get(sample_format)
+    if width != 2:
+        raise FrameError(f"Unsupported sample_format for WAV wrapping: {sample_format}")
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(width)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    buf.seek(0)
+    return buf
+
+
+# ------------------------------
+# Unix domain socket serving
+# ------------------------------
+def uds_path(name: str) -> str:
+    folder = os.environ.get("KIHBBI_UDS_DIR", tempfile.gettempdir())
+    return os.path.join(folder, f"kihbbi-{name}.sock")
+
+
+def serve(app, host: str, port: int, uds: str | None = None):
+    """Run one uvicorn server on TCP host:port and, if possible, on a Unix socket."""
+    import uvicorn
+
+    # proto must be IPPROTO_TCP: asyncio only sets TCP_NODELAY on accepted
+    # connections of such sockets (else Nagle adds ~40 ms to keep-alive requests)
+    tcp = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    tcp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    tcp.bind((host, port))
+    sockets = [tcp]
+
+    if uds and hasattr(socket, "AF_UNIX"):
+        if os.path.exists(uds):
+            os.remove(uds)  # stale socket from a previous run
+        unix = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        unix.bind(uds)
+        os.chmod(uds, 0o600)  # local user only
+        sockets.append(unix)
+        print(f"[Transport] Listening on http://{host}:{port} and unix:{uds}")
+    elif uds:
+        print(f"[Transport] Unix sockets not supported here, TCP only on {host}:{port}")
+
+    try:
+        uvicorn.Server(uvicorn.Config(app, log_level="info")).run(sockets=sockets)
+    finally:
+        if len(sockets) > 1 and os.path.exists(uds):
+            os.remove(uds)
+
+
+def serve_main(app, name: str, default_port: int):
+    """`python <server>.py [--host H] [--port P] [--uds PATH]` -> serve()."""
+    parser = argparse.ArgumentParser(description=f"kihbbi {name} server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=default_port)
+    parser.add_argument("--uds", default=uds_path(name), help="Unix socket path, '' for TCP only")
+    args = parser.parse_args()
+    serve(app, args.host, args.port, args.uds or None)
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """http.client connection over a Unix domain socket (for local Python clients)."""
+
+    def __init__(self, path: str, timeout: float = 60.0):
+        super().__init__("localhost", timeout=timeout)
+        self.uds = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.uds)
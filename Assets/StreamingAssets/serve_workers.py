@@ -0,0 +1,223 @@
+"""
+Multi-worker launcher that shares model weights between workers.
+
+`uvicorn --workers N` starts N fresh interpreters and every one of them loads
+its own copy of the model, so RSS grows linearly with N. This launcher
+imports the server module ONCE in a master process and then fork()s the
+workers, so the weights are shared copy-on-write.
+
+A server module opts in with two hooks (see TTS/piper_server.py):
+  prepare_fork()  master, after loading: keep only fork-safe state (weights)
+  post_fork()     each worker: rebuild runtime objects (sessions, thread pools)
+on top of the shared weights. Modules without hooks (whisper_server: the
+CTranslate2 model owns threads that die on fork) and Windows (no fork) fall
+back to normal uvicorn workers, each with a private copy.
+
+Per-worker memory (RSS / PSS / USS / shared) is printed after startup and on
+SIGUSR1.
+
+Run from StreamingAssets:
+  python serve_workers.py TTS/piper_server:app --workers 4 --port 8011
+"""
+import argparse
+import gc
+import importlib
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+
+
+def memory_usage(pid: int) -> dict | None:
+    """RSS/PSS/USS/shared in MB for one process (Linux smaps_rollup, else psutil)."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            kb = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    kb[parts[0][:-1]] = int(parts[1])
+        return {
+            "rss": kb.get("Rss", 0) / 1024,
+            "pss": kb.get("Pss", 0) / 1024,
+            "uss": (kb.get("Private_Clean", 0) + kb.get("Private_Dirty", 0)) / 1024,
+            "shared": (kb.get("Shared_Clean", 0) + kb.get("Shared_Dirty", 0)) / 1024,
+        }
+    except OSError:
+        pass
+
+    try:
+        import psutil
+        info = psutil.Process(pid).memory_full_info()
+        pss = getattr(info, "pss", None)
+        return {
+            "rss": info.rss / 1024**2,
+            "pss": pss / 1024**2 if pss is not None else None,
+            "uss": info.uss / 1024**2,
+            "shared": (info.rss - info.uss) / 1024**2,
+        }
+    except Exception:
+        return None
+
+
+def print_memory_report(master_pid: int, worker_pids: list[int]):
+    print("[Workers] Memory (MB)   pid        RSS        PSS        USS     shared")
+    total_pss = 0.0
+    for label, pid in [("master", master_pid)] + [(f"worker{i}", p) for i, p in enumerate(worker_pids)]:
+        mem = memory_usage(pid)
+        if mem is None:
+            print(f"[Workers] {label:<12} {pid:>6}   (unavailable)")
+            continue
+        total_pss += mem["pss"] or 0.0
+        fmt = lambda v: f"{v:10.1f}" if v is not None else "       n/a"
+        print(f"[Workers] {label:<12} {pid:>6} {fmt(mem['rss'])} {fmt(mem['pss'])} {fmt(mem['uss'])} {fmt(mem['shared'])}")
+    # PSS sums to the real footprint: shared pages are split between processes
+    print(f"[Workers] Total PSS: {total_pss:.1f} MB for {len(worker_pids)} workers")
+
+
+def load_target(target: str):
+    """'TTS/piper_server:app' -> (module, app)"""
+    path, _, attr = target.partition(":")
+    folder, module_name = os.path.split(path)
+    folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), folder)
+    sys.path.insert(0, folder)
+    os.chdir(folder)
+    module = importlib.import_module(module_name)
+    return module, getattr(module, attr or "app")
+
+
+def serve_worker(app, sock: socket.socket, module):
+    import uvicorn
+
+    if hasattr(module, "post_fork"):
+        module.post_fork()
+    config = uvicorn.Config(app, log_level="info")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def run_spawned(target: str, args):
+    """Plain `uvicorn --workers N`. exec() so a preloaded master doesn't keep its copy."""
+    path, _, attr = target.partition(":")
+    folder, module_name = os.path.split(path)
+    app_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), folder)
+    print(f"[Workers] Falling back to {args.workers} spawned workers (weights NOT shared)")
+    sys.stdout.flush()
+    os.execv(sys.executable, [
+        sys.executable, "-m", "uvicorn", f"{module_name}:{attr or 'app'}",
+        "--host", args.host, "--port", str(args.port),
+        "--workers", str(args.workers), "--app-dir", app_dir,
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preload-then-fork uvicorn workers")
+    parser.add_argument("target", help="server module under StreamingAssets, e.g. TTS/piper_server:app")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--report-after", type=float, default=10.0,
+                        help="seconds after startup to print the memory report (0 = never)")
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        return run_spawned(args.target, args)
+
+    # Bind before loading so a busy port fails fast
+    # proto must be IPPROTO_TCP: asyncio only sets TCP_NODELAY on accepted
+    # connections of such sockets (else Nagle adds ~40 ms to keep-alive requests)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    t0 = time.time()
+    module, app = load_target(args.target)
+    print(f"[Workers] Preloaded {args.target} in {time.time() - t0:.1f}s")
+
+    if not (hasattr(module, "prepare_fork") and hasattr(module, "post_fork")):
+        print(f"[Workers] {args.target} has no prepare_fork/post_fork hooks, it is not fork-safe")
+        sock.close()
+        return run_spawned(args.target, args)
+
+    try:
+        module.prepare_fork()
+    except Exception as e:
+        print(f"[Workers] prepare_fork failed: {type(e).__name__}: {e}")
+        sock.close()
+        return run_spawned(args.target, args)
+
+    # Move everything allocated so far out of the GC's reach: collections in the
+    # workers would otherwise write to these objects' headers and un-share pages.
+    gc.collect()
+    gc.freeze()
+
+    workers = {}
+    shutting_down = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGUSR1, signal.SIG_DFL)
+            # os._exit skips the interpreter's own traceback printing: do it here,
+            # and exit non-zero so the master can tell a crash from a clean stop
+            try:
+                serve_worker(app, sock, module)
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 1
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            else:
+                code = 0
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+        workers[pid] = time.time()
+        print(f"[Workers] Started worker pid={pid}")
+
+    def shutdown(signum, frame):
+        nonlocal shutting_down
+        shutting_down = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGUSR1, lambda s, f: print_memory_report(os.getpid(), list(workers)))
+
+    for _ in range(args.workers):
+        spawn()
+
+    if args.report_after > 0:
+        signal.signal(signal.SIGALRM, lambda s, f: print_memory_report(os.getpid(), list(workers)))
+        signal.setitimer(signal.ITIMER_REAL, args.report_after)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+            status = os.waitstatus_to_exitcode(status)
+        except InterruptedError:
+            continue
+        except ChildProcessError:
+            break
+        started = workers.pop(pid, time.time())
+        if shutting_down:
+            continue
+        if time.time() - started < 5.0:
+            print(f"[Workers] Worker pid={pid} died right after start (status {status}), not restarting")
+            continue
+        # Re-fork from the still-preloaded master: no model reload needed
+        print(f"[Workers] Worker pid={pid} exited (status {status}), restarting")
+        spawn()
+
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
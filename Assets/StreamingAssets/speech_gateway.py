@@ -0,0 +1,215 @@
+"""
+Single-process speech gateway.
+
+Hosts whisper_server (STT), piper_server and xtts_server (TTS) in ONE Python
+process instead of three uvicorn processes. All engines share:
+  - one interpreter / FastAPI stack / torch + onnxruntime import
+  - one global compute scheduler (admission control for model inference)
+  - one thread budget (Python worker threads + native math threads)
+
+Routes are the engines' own routes under a prefix:
+  /whisper/stt   /piper/tts   /xtts/tts   (+ /piper/health, /piper/speakers, ...)
+  /router/tts    XTTS with Piper fallback under load (see TTS/tts_router.py)
+
+Run from StreamingAssets:
+  python speech_gateway.py --port 8012      (TCP + Unix socket, see local_transport.py)
+  python -m uvicorn speech_gateway:app --host 127.0.0.1 --port 8012      (TCP only)
+"""
+import os
+import sys
+import time
+import importlib
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+# ------------------------------
+# GATEWAY CONFIG
+# ------------------------------
+# Which engines to load, comma separated (env KIHBBI_ENGINES overrides).
+ENABLED_ENGINES = [e.strip() for e in os.environ.get("KIHBBI_ENGINES", "whisper,piper,xtts").split(",") if e.strip()]
+
+# Total CPU threads the gateway may use across ALL engines.
+THREAD_BUDGET = max(1, int(os.environ.get("KIHBBI_THREAD_BUDGET", str(os.cpu_count() or 4))))
+
+# How many inference jobs may run at the same time (all engines together).
+COMPUTE_SLOTS = max(1, int(os.environ.get("KIHBBI_COMPUTE_SLOTS", "2")))
+
+# Per-engine cap inside the global slots (XTTS is heavy, keep it to one at a time).
+# None = not scheduled at the mount: the router takes xtts/piper slots itself.
+# Capped below COMPUTE_SLOTS (see engine_slot_limits) so one engine always
+# leaves a slot for the others.
+ENGINE_SLOTS = {
+    "whisper": 1,
+    "piper": 2,
+    "xtts": 1,
+    "router": None,
+}
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# name -> (sub folder, module name)
+ENGINES = {
+    "whisper": ("STT", "whisper_server"),
+    "piper": ("TTS", "piper_server"),
+    "xtts": ("TTS", "xtts_server"),
+    "router": ("TTS", "tts_router"),
+}
+
+# Each running job gets an equal share of the budget for its native threads.
+# These must be set BEFORE torch / ctranslate2 / onnxruntime are imported.
+NATIVE_THREADS = max(1, THREAD_BUDGET // COMPUTE_SLOTS)
+os.environ.setdefault("OMP_NUM_THREADS", str(NATIVE_THREADS))
+os.environ.setdefault("MKL_NUM_THREADS", str(NATIVE_THREADS))
+os.environ.setdefault("WHISPER_CPU_THREADS", str(NATIVE_THREADS))
+# onnxruntime ignores OMP_NUM_THREADS: piper_server sizes its session from this
+os.environ.setdefault("PIPER_INTRA_OP_THREADS", str(NATIVE_THREADS))
+
+import anyio.to_thread
+from fastapi import FastAPI
+
+
+class ComputeScheduler:
+    """
+    Global admission control for inference requests.
+    A job needs one global slot AND one slot of its engine, so a burst on one
+    engine can't starve the others and the total never exceeds COMPUTE_SLOTS.
+    """
+
+    def __init__(self, total_slots: int, engine_slots: dict[str, int]):
+        self.total_slots = total_slots
+        self.engine_slots = dict(engine_slots)
+        self._global = anyio.Semaphore(total_slots)
+        self._engines = {name: anyio.Semaphore(n) for name, n in engine_slots.items()}
+        self.waiting = defaultdict(int)
+        self.running = defaultdict(int)
+        self.completed = defaultdict(int)
+        self.wait_time = defaultdict(float)
+
+    @asynccontextmanager
+    async def slot(self, engine: str):
+        t0 = time.perf_counter()
+        queued = True
+        self.waiting[engine] += 1
+        try:
+            async with self._engines[engine]:
+                async with self._global:
+                    queued = False
+                    self.waiting[engine] -= 1
+                    self.wait_time[engine] += time.perf_counter() - t0
+                    self.running[engine] += 1
+                    try:
+                        yield
+                    finally:
+                        self.running[engine] -= 1
+                        self.completed[engine] += 1
+        finally:
+            # cancelled (client went away) while still queued
+            if queued:
+                self.waiting[engine] -= 1
+
+    def load(self, engine: str) -> int:
+        """Jobs waiting for or holding a slot of this engine."""
+        return self.waiting[engine] + self.running[engine]
+
+    def stats(self) -> dict:
+        return {
+            name: {
+                "slots": self.engine_slots[name],
+                "waiting": self.waiting[name],
+                "running": self.running[name],
+                "completed": self.completed[name],
+                "avg_wait_sec": round(self.wait_time[name] / self.completed[name], 4) if self.completed[name] else 0.0,
+            }
+            for name in self.engine_slots
+        }
+
+
+class ScheduledEngine:
+    """ASGI wrapper: POST requests to a mounted engine go through the scheduler."""
+
+    def __init__(self, name: str, engine_app, scheduler: ComputeScheduler):
+        self.name = name
+        self.app = engine_app
+        self.scheduler = scheduler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST":
+            async with self.scheduler.slot(self.name):
+                await self.app(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+
+def engine_slot_limits(engine_slots: dict, total_slots: int) -> dict[str, int]:
+    """Scheduled engines only, each capped at total_slots - 1 (when there is more than one slot)."""
+    cap = max(1, total_slots - 1)
+    return {name: min(n, cap) for name, n in engine_slots.items() if n is not None}
+
+
+def load_engine(name: str):
+    folder, module_name = ENGINES[name]
+    engine_dir = os.path.join(BASE_DIR, folder)
+    if engine_dir not in sys.path:
+        sys.path.insert(0, engine_dir)
+
+    t0 = time.time()
+    print(f"[Gateway] Loading engine '{name}' ({folder}/{module_name}.py)...")
+    module = importlib.import_module(module_name)
+    # piper_server catches its own model load errors and runs with voice = None
+    if getattr(module, "voice", True) is None:
+        raise RuntimeError(f"{module_name} imported but its voice model did not load")
+    print(f"[Gateway] Engine '{name}' ready in {time.time() - t0:.1f}s")
+    return module
+
+
+scheduler = ComputeScheduler(COMPUTE_SLOTS, engine_slot_limits(ENGINE_SLOTS, COMPUTE_SLOTS))
+app = FastAPI()
+loaded = {}
+
+for engine_name in ENABLED_ENGINES:
+    if engine_name not in ENGINES:
+        print(f"[Gateway] WARNING: Unknown engine '{engine_name}', skipping")
+        continue
+    try:
+        loaded[engine_name] = load_engine(engine_name)
+    except Exception as e:
+        # Don't come up half-loaded: clients would get 404s on the missing
+        # engine's routes while the launcher reports it ready.
+        print(f"[Gateway] ERROR: Failed to load engine '{engine_name}': {type(e).__name__}: {e}")
+        raise RuntimeError(f"Engine '{engine_name}' failed to load, gateway not started") from e
+
+    if ENGINE_SLOTS.get(engine_name) is None:
+        # Router: xtts_server / piper_server are the same module objects as the
+        # mounted engines, so gate its jobs on their slots instead.
+        loaded[engine_name].engine_gate = scheduler.slot
+        loaded[engine_name].engine_load = scheduler.load
+        app.mount(f"/{engine_name}", loaded[engine_name].app)
+    else:
+        app.mount(f"/{engine_name}", ScheduledEngine(engine_name, loaded[engine_name].app, scheduler))
+
+
+@app.on_event("startup")
+async def apply_thread_budget():
+    # Sync endpoints (piper/xtts /tts) and whisper decoding all run in anyio's
+    # worker pool; cap it so Python threads share the same budget.
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREAD_BUDGET
+    print(f"[Gateway] Engines: {list(loaded)} | thread_budget={THREAD_BUDGET} "
+          f"compute_slots={COMPUTE_SLOTS} native_threads={NATIVE_THREADS}")
+
+
+@app.get("/health")
+def health_check():
+    return {
+        "status": "healthy" if loaded else "error",
+        "engines": list(loaded),
+        "thread_budget": THREAD_BUDGET,
+        "compute_slots": COMPUTE_SLOTS,
+        "native_threads": NATIVE_THREADS,
+        "scheduler": scheduler.stats(),
+    }
+
+
+if __name__ == "__main__":
+    # TCP for Unity + Unix socket for local clients (SpeechGatewayServerManager runs this)
+    from local_transport import serve_main
+    serve_main(app, "gateway", 8012)
@@ -0,0 +1,214 @@
+"""
+speech_gateway (one process) vs the three separate servers.
+
+For each setup it measures:
+  startup   seconds from launch until every engine answers
+  memory    idle RSS / PSS per process and in total, after startup settles
+  latency   p50/p95/p99 per engine under a mixed concurrent load
+            (clients pick whisper / piper / xtts requests at random)
+
+Needs the real models, so run it on the target machine, from the repo root,
+with the same Python the servers use:
+
+  python Tools/bench_gateway.py --requests 60 --concurrency 4
+  python Tools/bench_gateway.py --engines whisper,piper --mode gateway
+
+STT uploads use --stt-wav, or the first Piper reply if not given.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+ASSETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Assets", "StreamingAssets")
+sys.path.insert(0, ASSETS)
+from local_transport import percentile
+from serve_workers import memory_usage
+
+GATEWAY_PORT = 8012
+# engine -> (folder, module, port) as launched by the *ServerManager scripts
+SEPARATE = {
+    "whisper": ("STT", "whisper_server", 8007),
+    "piper": ("TTS", "piper_server", 8011),
+    "xtts": ("TTS", "xtts_server", 8010),
+}
+TTS_TEXTS = [
+    "Hehe, you're back already? Did you miss me that much?",
+    "Limsa smells like fish and salt, but Mist is home, so I'll allow it.",
+    "We could run the dungeon at eight, or later if the Free Company needs us first.",
+    "Nope. Absolutely not. I refuse to eat anything cooked in that kitchen again.",
+]
+
+
+def launch_gateway(engines: list[str]) -> dict:
+    env = dict(os.environ, KIHBBI_ENGINES=",".join(engines))
+    proc = subprocess.Popen(
+        [sys.executable, "speech_gateway.py", "--host", "127.0.0.1", "--port", str(GATEWAY_PORT)],
+        cwd=ASSETS, env=env,
+    )
+    return {"procs": [proc], "routes": {e: (GATEWAY_PORT, f"/{e}") for e in engines}}
+
+
+def launch_separate(engines: list[str]) -> dict:
+    # StreamingAssets on PYTHONPATH for local_transport.py, as the *ServerManager scripts do
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ASSETS, os.environ.get("PYTHONPATH")])))
+    procs, routes = [], {}
+    for engine in engines:
+        folder, module, port = SEPARATE[engine]
+        procs.append(subprocess.Popen(
+            [sys.executable, f"{module}.py", "--host", "127.0.0.1", "--port", str(port)],
+            cwd=os.path.join(ASSETS, folder), env=env,
+        ))
+        routes[engine] = (port, "")
+    return {"procs": procs, "routes": routes}
+
+
+def wait_ready(setup: dict, timeout: float) -> float:
+    t0 = time.time()
+    pending = dict(setup["routes"])
+    while pending:
+        if any(p.poll() is not None for p in setup["procs"]):
+            raise RuntimeError("a server exited during startup")
+        if time.time() - t0 > timeout:
+            raise RuntimeError(f"not ready after {timeout:.0f}s: {list(pending)}")
+        for engine, (port, prefix) in list(pending.items()):
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+                conn.request("GET", f"{prefix}/openapi.json")
+                if conn.getresponse().status == 200:
+                    del pending[engine]
+                conn.close()
+            except OSError:
+                pass
+        time.sleep(0.2)
+    return time.time() - t0
+
+
+def post(port: int, path: str, body: bytes, content_type: str) -> tuple[float, bytes]:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+    t0 = time.perf_counter()
+    conn.request("POST", path, body=body, headers={"Content-Type": content_type})
+    resp = conn.getresponse()
+    data = resp.read()
+    dt = time.perf_counter() - t0
+    conn.close()
+    if resp.status != 200:
+        raise RuntimeError(f"{path}: HTTP {resp.status} {data[:200]!r}")
+    return dt, data
+
+
+def tts_request(engine: str, text: str) -> bytes:
+    payload = {"text": text, "language": "en"}
+    if engine == "piper":
+        payload["speaker_id"] = 0
+    return json.dumps(payload).encode()
+
+
+def stt_request(wav: bytes) -> tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="audio"; filename="utt.wav"\r\n'
+        "Content-Type: audio/wav\r\n\r\n"
+    ).encode() + wav + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def one_request(setup: dict, engine: str, stt_wav: bytes | None) -> float:
+    port, prefix = setup["routes"][engine]
+    if engine == "whisper":
+        body, content_type = stt_request(stt_wav)
+        return post(port, f"{prefix}/stt", body, content_type)[0]
+    return post(port, f"{prefix}/tts", tts_request(engine, random.choice(TTS_TEXTS)), "application/json")[0]
+
+
+def run_setup(name: str, setup: dict, args, stt_wav: bytes | None) -> dict:
+    try:
+        startup = wait_ready(setup, args.timeout)
+        print(f"[{name}] ready in {startup:.1f}s, settling {args.settle:.0f}s...")
+        time.sleep(args.settle)
+        memory = {p.pid: memory_usage(p.pid) for p in setup["procs"]}
+
+        engines = list(setup["routes"])
+        if "whisper" in engines and stt_wav is None:
+            if "piper" not in engines:
+                raise RuntimeError("whisper needs --stt-wav when piper is not enabled")
+            port, prefix = setup["routes"]["piper"]
+            stt_wav = post(port, f"{prefix}/tts", tts_request("piper", TTS_TEXTS[0]), "application/json")[1]
+
+        # one warm-up call per engine (first CUDA call, lazy allocations)
+        for engine in engines:
+            one_request(setup, engine, stt_wav)
+
+        random.seed(args.seed)
+        plan = [random.choice(engines) for _ in range(args.requests)]
+        latencies = {e: [] for e in engines}
+        t0 = time.time()
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            for engine, dt in zip(plan, pool.map(lambda e: one_request(setup, e, stt_wav), plan)):
+                latencies[engine].append(dt)
+        wall = time.time() - t0
+        return {"startup": startup, "memory": memory, "latencies": latencies, "wall": wall}
+    finally:
+        for p in setup["procs"]:
+            p.terminate()
+        for p in setup["procs"]:
+            try:
+                p.wait(15)
+            except subprocess.TimeoutExpired:
+                p.kill()
+
+
+def report(name: str, result: dict):
+    print(f"\n== {name} ==")
+    print(f"startup          {result['startup']:8.1f} s")
+    total_rss = total_pss = 0.0
+    for pid, mem in result["memory"].items():
+        if mem is None:
+            print(f"memory pid {pid:<6}      n/a")
+            continue
+        total_rss += mem["rss"]
+        total_pss += mem["pss"] or 0.0
+        print(f"memory pid {pid:<6} RSS {mem['rss']:8.1f} MB  PSS {mem['pss'] or 0.0:8.1f} MB")
+    print(f"memory total     RSS {total_rss:8.1f} MB  PSS {total_pss:8.1f} MB")
+    print(f"load wall time   {result['wall']:8.1f} s")
+    print(f"{'engine':<10}{'n':>5}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}")
+    for engine, values in result["latencies"].items():
+        if values:
+            print(f"{engine:<10}{len(values):>5}{percentile(values, 0.5):9.3f}"
+                  f"{percentile(values, 0.95):9.3f}{percentile(values, 0.99):9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engines", default="whisper,piper,xtts")
+    parser.add_argument("--mode", choices=["both", "gateway", "separate"], default="both")
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--settle", type=float, default=10.0, help="idle seconds before reading memory")
+    parser.add_argument("--timeout", type=float, default=600.0, help="startup timeout (model downloads!)")
+    parser.add_argument("--stt-wav", help="WAV uploaded to whisper (default: first Piper reply)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+    unknown = set(engines) - set(SEPARATE)
+    if unknown:
+        sys.exit(f"unknown engines: {sorted(unknown)}")
+    stt_wav = open(args.stt_wav, "rb").read() if args.stt_wav else None
+
+    # one at a time: the setups use the same GPU / cores
+    if args.mode in ("both", "separate"):
+        report("separate processes", run_setup("separate", launch_separate(engines), args, stt_wav))
+    if args.mode in ("both", "gateway"):
+        report("speech_gateway", run_setup("gateway", launch_gateway(engines), args, stt_wav))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+TTS text normalization micro-benchmark.
+
+Times the old xtts_server.sanitize_text (copied below as the baseline)
+against text_normalizer over a corpus of LLM replies, cold (every reply
+new) and memoized. The memoized rows clear the cache at the start of each
+pass too, and only the repeats inside the pass (short acknowledgements,
+retries) can hit, so the reported hit ratio is what a conversation sees.
+
+The built-in corpus is a set of typical Kihbbi replies (asterisk actions,
+smart quotes, emoji, numbers). Use --corpus for real logs: a .txt file with
+one reply per line, or a .json list of strings / AI/memory.json.
+
+  python Tools/bench_normalize.py --passes 200
+  python Tools/bench_normalize.py --corpus Assets/StreamingAssets/AI/memory.json --show
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Assets", "StreamingAssets", "TTS"))
+import text_normalizer
+
+CORPUS = [
+    "Hehe~ *flicks tail* You're back already? Did you miss me that much? 😏",
+    "Mhm, okay.",
+    "*stretches and yawns* Ugh, I stayed up way too late grinding Ninja levels… 90 to 91 took forever!",
+    "Pizza again?! Tashiro, that’s the 3rd time this week — not that I’m complaining 🍕🍕",
+    "Oh! Oh! Did you see the new glamour? The hoodie’s purple AND it has little ear holes for Miqo’te ears!!",
+    "I’m not saying you’re wrong… I’m just saying I’m right. There’s a difference, y’know? 😼",
+    "It costs like 2,500,000 gil on the market board. That’s 2.5 million, Tashiro. MILLION.",
+    "Dr. Arkadin said the aether readings were up 12% near the Twelveswood, e.g., around Bentbranch.",
+    "*pokes your cheek* Hey. Hey. Hey. You’re spacing out again~",
+    "Nope! Absolutely not. I refuse to eat anything Lalafell-cooked after what happened in 1572. Never again.",
+    "We could run the dungeon at 8pm? Or 9:30 if the Free Company needs us first.",
+    "…fine. But only because you asked nicely. *grumbles* And you owe me a sweet roll.",
+    "Ahaha, you should’ve seen your face!!! 10/10, would scare you again 💙✨",
+    "Limsa smells like fish and salt and, uh… more fish. But Mist is home, so I’ll allow it.",
+    "Hmm… maybe? I dunno. Ask me again after my 2nd coffee ☕",
+    "“Be careful,” she said. “The Sahagin don’t play nice.” As if I didn’t know that already!",
+    "*spins a dagger between her fingers* White Mage by day, Ninja by night~ Best of both worlds, right?",
+    "Ooh, heavy music? Put it on! Louder! LOUDER!! 🤘",
+    "It’s -5° out in Coerthas… why do we ALWAYS have to go there when it’s snowing?!",
+    "Wait wait wait — you beat the savage raid on your 1st try?? No way. Screenshot or it didn’t happen.",
+    "Ok.",
+    "That’ll be 350 gil & a hug, thanks 😇",
+    "Honestly? Rikku-chan would’ve loved this. She always said the Crystal Gemstones were the best FC in Eorzea.",
+    "Soooo… are we going fishing or are you gonna keep staring at the retainer list for another 20 minutes?",
+    "I counted! You said “just one more” exactly 7 times. SEVEN. 😤",
+]
+
+# Replies repeat a lot (short acknowledgements, retries, the router re-sending
+# a sentence to Piper after an XTTS miss): weight the memoized run accordingly.
+REPEATED = ["Mhm, okay.", "Ok.", "Hehe~ *flicks tail* You're back already? Did you miss me that much? 😏"]
+
+
+def sanitize_text(text: str) -> str:
+    """Baseline: xtts_server.sanitize_text before text_normalizer (verbatim)."""
+    if not text or not text.strip():
+        return ""
+    text = text.strip()
+    text = text.replace('"', '"').replace('"', '"').replace("'", "'").replace("'", "'")
+    text = text.replace('—', '-').replace('–', '-')
+    text = text.replace('…', '...')
+    text = text.encode('ascii', 'ignore').decode('ascii')
+    text = ''.join(c for c in text if c.isprintable() or c in ' \n\r\t')
+    text = re.sub(r'[^a-zA-Z0-9\s.,!?\-\'\" ]', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[.,!?]{2,}', '.', text)
+    text = re.sub(r'\s+[.,!?]\s+', '. ', text)
+    text = text.strip(' .,!?;:-')
+    words = [word.strip('.,!?') for word in text.split() if any(c.isalnum() for c in word)]
+    if len(words) < 2:
+        return ""
+    text = ' '.join(words)
+    if len(text) < 5 or len(text) > 200:
+        return ""
+    return text
+
+
+def legacy_xtts(text: str):
+    # the endpoint then counted words and alnum characters three more times
+    text = sanitize_text(text)
+    words = [w for w in text.split() if any(c.isalnum() for c in w)]
+    alnum = sum(c.isalnum() for c in text)
+    word_count = len([w for w in text.split() if any(c.isalnum() for c in w)])
+    return text, len(words), alnum, word_count
+
+
+def load_corpus(path: str) -> list[str]:
+    with open(path, encoding="utf-8") as f:
+        if not path.endswith(".json"):
+            return [line.strip() for line in f if line.strip()]
+        data = json.load(f)
+    if isinstance(data, dict):  # AI/memory.json
+        data = [m.get("memory", "") for m in data.get("memories", [])]
+    return [str(t) for t in data if str(t).strip()]
+
+
+def conversation(corpus: list[str]) -> list[str]:
+    """The corpus with the REPEATED replies interleaved, as a session would send them."""
+    mixed, every = [], max(1, len(corpus) // (len(REPEATED) * 2))
+    for i, text in enumerate(corpus):
+        mixed.append(text)
+        if i % every == every - 1:
+            mixed.append(REPEATED[(i // every) % len(REPEATED)])
+    return mixed
+
+
+def hit_ratio(fn, texts: list[str]) -> float:
+    fn.cache_clear()
+    for text in texts:
+        fn(text)
+    info = fn.cache_info()
+    return info.hits / (info.hits + info.misses)
+
+
+def bench(fn, corpus: list[str], passes: int, clear=None) -> float:
+    """Mean microseconds per reply."""
+    best = float("inf")
+    for _ in range(3):
+        t0 = time.perf_counter()
+        for _ in range(passes):
+            if clear:
+                clear()
+            for text in corpus:
+                fn(text)
+        best = min(best, time.perf_counter() - t0)
+    return best / (passes * len(corpus)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="replies file (.txt one per line, or .json)")
+    parser.add_argument("--passes", type=int, default=200)
+    parser.add_argument("--show", action="store_true", help="print each reply before/after")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else CORPUS
+    if not corpus:
+        sys.exit("empty corpus")
+    chars = sum(len(t) for t in corpus)
+    print(f"{len(corpus)} replies, {chars / len(corpus):.0f} chars avg, {args.passes} passes (best of 3)")
+
+    if args.show:
+        for text in corpus:
+            print(f"\n  in:    {text}\n  old:   {sanitize_text(text)}\n  xtts:  {text_normalizer.normalize_for_xtts(text).text}"
+                  f"\n  piper: {text_normalizer.normalize_for_piper(text).text}")
+        print()
+
+    xtts, piper = text_normalizer.normalize_for_xtts, text_normalizer.normalize_for_piper
+    mixed = conversation(corpus)
+    rows = [
+        ("xtts  legacy sanitize + counts", legacy_xtts, mixed, None),
+        ("xtts  normalizer, uncached fn", text_normalizer._normalize_xtts, mixed, None),
+        ("xtts  normalizer, cold cache", xtts, corpus, xtts.cache_clear),
+        ("xtts  normalizer, conversation", xtts, mixed, xtts.cache_clear),
+        ("piper normalizer, cold cache", piper, corpus, piper.cache_clear),
+        ("piper normalizer, conversation", piper, mixed, piper.cache_clear),
+    ]
+    print(f"{'':<34}{'us/reply':>10}{'hit ratio':>11}")
+    for name, fn, texts, clear in rows:
+        ratio = f"{hit_ratio(fn, texts):10.0%}" if clear else ""
+        print(f"{name:<34}{bench(fn, texts, args.passes, clear):10.2f} {ratio}")
+
+
+if __name__ == "__main__":
+    main()
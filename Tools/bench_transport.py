@@ -0,0 +1,180 @@
+"""
+Round-trip latency of the local transports for small per-sentence payloads.
+
+Compares, over loopback TCP and over a Unix domain socket:
+  stt  multipart WAV upload -> JSON      vs  framed PCM -> framed JSON
+  tts  JSON request         -> WAV       vs  framed request -> framed PCM
+
+The server is a stand-in with the same request/response shapes as the real
+endpoints (no models), so only transport + parsing cost is measured. It is
+served with local_transport.serve(), exactly like the STT/TTS servers.
+
+  python Tools/bench_transport.py --requests 2000
+"""
+import argparse
+import http.client
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import wave
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Assets", "StreamingAssets"))
+from local_transport import UnixHTTPConnection, decode_frame, encode_frame, percentile, FRAME_MEDIA_TYPE
+
+STT_SECONDS = 1.0    # utterance uploaded to STT (16 kHz int16)
+TTS_SECONDS = 2.0    # sentence returned by TTS (22.05 kHz int16)
+
+
+def make_wav(pcm: bytes, rate: int) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(pcm)
+    return buf.getvalue()
+
+
+def build_app():
+    from fastapi import FastAPI, File, Request, UploadFile
+    from fastapi.responses import JSONResponse, Response
+    from pydantic import BaseModel
+    from local_transport import FrameResponse
+
+    app = FastAPI()
+    tts_pcm = bytes(int(22050 * TTS_SECONDS) * 2)
+    stt_result = {"text": "turn the lights off please", "lang": "en", "time_sec": 0.0, "model": "small"}
+
+    class TTSRequest(BaseModel):
+        text: str
+        language: str = "en"
+
+    @app.post("/stt")
+    async def stt(audio: UploadFile = File(...)):
+        await audio.read()
+        return JSONResponse(stt_result)
+
+    @app.post("/stt/raw")
+    async def stt_raw(request: Request):
+        decode_frame(await request.body())
+        return FrameResponse(stt_result)
+
+    @app.post("/tts")
+    def tts(req: TTSRequest):
+        return Response(content=make_wav(tts_pcm, 22050), media_type="audio/wav")
+
+    @app.post("/tts/raw")
+    async def tts_raw(request: Request):
+        header, _ = decode_frame(await request.body())
+        TTSRequest(**header)
+        return FrameResponse({"sample_rate": 22050, "channels": 1, "sample_format": "int16",
+                              "frames": len(tts_pcm) // 2}, tts_pcm)
+
+    return app
+
+
+def serve(port: int, uds: str):
+    from local_transport import serve as serve_app
+    serve_app(build_app(), "127.0.0.1", port, uds)
+
+
+def multipart(field: str, filename: str, data: bytes) -> tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        "Content-Type: audio/wav\r\n\r\n"
+    ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def round_trip(conn, path: str, body: bytes, content_type: str) -> bytes:
+    conn.request("POST", path, body=body, headers={"Content-Type": content_type})
+    resp = conn.getresponse()
+    data = resp.read()
+    if resp.status != 200:
+        raise RuntimeError(f"{path}: HTTP {resp.status} {data[:200]!r}")
+    return data
+
+
+def bench_case(conn, path, body, content_type, parse, n: int) -> list[float]:
+    for _ in range(min(50, n)):
+        parse(round_trip(conn, path, body, content_type))
+    times = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        parse(round_trip(conn, path, body, content_type))
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def parse_wav(data: bytes):
+    with wave.open(io.BytesIO(data), "rb") as wav:
+        return wav.readframes(wav.getnframes())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--uds", default=os.path.join(tempfile.gettempdir(), "kihbbi-bench.sock"))
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args.port, args.uds)
+
+    server = subprocess.Popen([sys.executable, __file__, "--serve", "--port", str(args.port), "--uds", args.uds])
+    try:
+        transports = {"tcp": lambda: http.client.HTTPConnection("127.0.0.1", args.port, timeout=30)}
+        if hasattr(socket, "AF_UNIX"):
+            transports["uds"] = lambda: UnixHTTPConnection(args.uds, timeout=30)
+
+        # wait for the server
+        deadline = time.time() + 30
+        while True:
+            try:
+                conn = transports["tcp"]()
+                conn.request("GET", "/docs")
+                conn.getresponse().read()
+                conn.close()
+                break
+            except OSError:
+                if time.time() > deadline:
+                    sys.exit("bench server did not start")
+                time.sleep(0.2)
+
+        stt_pcm = bytes(int(16000 * STT_SECONDS) * 2)
+        stt_multipart, stt_multipart_type = multipart("audio", "utt.wav", make_wav(stt_pcm, 16000))
+        stt_frame = encode_frame({"sample_rate": 16000, "channels": 1, "sample_format": "int16"}, stt_pcm)
+        tts_json = json.dumps({"text": "Sure, I can help you with that right now.", "language": "en"}).encode()
+        tts_frame = encode_frame({"text": "Sure, I can help you with that right now.", "language": "en"})
+
+        cases = [
+            ("stt multipart->json", "/stt", stt_multipart, stt_multipart_type, json.loads),
+            ("stt frame->frame", "/stt/raw", stt_frame, FRAME_MEDIA_TYPE, decode_frame),
+            ("tts json->wav", "/tts", tts_json, "application/json", parse_wav),
+            ("tts frame->frame", "/tts/raw", tts_frame, FRAME_MEDIA_TYPE, decode_frame),
+        ]
+
+        print(f"{'case':<22}{'transport':<11}{'p50 ms':>9}{'p95 ms':>9}{'mean ms':>9}")
+        for name, path, body, content_type, parse in cases:
+            for transport, connect in transports.items():
+                conn = connect()
+                times = bench_case(conn, path, body, content_type, parse, args.requests)
+                conn.close()
+                print(f"{name:<22}{transport:<11}{percentile(times, 0.5) * 1000:9.3f}"
+                      f"{percentile(times, 0.95) * 1000:9.3f}{sum(times) / len(times) * 1000:9.3f}")
+    finally:
+        server.terminate()
+        server.wait(10)
+
+
+if __name__ == "__main__":
+    main()
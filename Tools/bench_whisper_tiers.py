@@ -0,0 +1,127 @@
+"""
+Whisper tiering benchmark: accuracy (WER) and p50/p95 latency over a folder
+of recordings, against a running whisper_server.
+
+Each clip.wav may have a clip.txt next to it with the reference transcript.
+
+  1. start whisper_server normally (single MODEL_SIZE)     -> run with --out single.json
+  2. restart it with WHISPER_TIERED=1                        -> run with --out tiered.json --baseline single.json
+
+  python Tools/bench_whisper_tiers.py recordings/ --out tiered.json --baseline single.json
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import urllib.request
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Assets", "StreamingAssets"))
+from local_transport import percentile
+
+
+def post_wav(url: str, path: str) -> dict:
+    boundary = uuid.uuid4().hex
+    with open(path, "rb") as f:
+        data = f.read()
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="audio"; filename="{os.path.basename(path)}"\r\n'
+        "Content-Type: audio/wav\r\n\r\n"
+    ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+
+    req = urllib.request.Request(url, data=body, method="POST")
+    req.add_header("Content-Type", f"multipart/form-data; boundary={boundary}")
+    with urllib.request.urlopen(req, timeout=120) as resp:
+        return json.loads(resp.read())
+
+
+def words(text: str) -> list[str]:
+    return re.sub(r"[^a-z0-9' ]", " ", text.lower()).split()
+
+
+def word_errors(ref: list[str], hyp: list[str]) -> int:
+    """Levenshtein distance over words."""
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h))
+        prev = cur
+    return prev[-1]
+
+
+def summarize(results: list[dict]) -> dict:
+    lat = [r["latency_sec"] for r in results]
+    scored = [r for r in results if r["ref_words"]]
+    errors = sum(r["word_errors"] for r in scored)
+    ref_words = sum(r["ref_words"] for r in scored)
+    models = {}
+    for r in results:
+        models[r["model"]] = models.get(r["model"], 0) + 1
+    return {
+        "clips": len(results),
+        "wer": round(errors / ref_words, 4) if ref_words else None,
+        "p50_sec": percentile(lat, 0.5, 3),
+        "p95_sec": percentile(lat, 0.95, 3),
+        "escalated": sum(1 for r in results if r["escalated"]),
+        "models": models,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", help="folder with .wav files (+ optional .txt references)")
+    parser.add_argument("--url", default="http://127.0.0.1:8007/stt")
+    parser.add_argument("--out", help="write per-clip results + summary as JSON")
+    parser.add_argument("--baseline", help="JSON from a previous run to compare against")
+    parser.add_argument("--warmup", type=int, default=1, help="requests to discard before measuring")
+    args = parser.parse_args()
+
+    clips = sorted(os.path.join(args.folder, f) for f in os.listdir(args.folder) if f.lower().endswith(".wav"))
+    if not clips:
+        sys.exit(f"No .wav files in {args.folder}")
+
+    for _ in range(args.warmup):
+        post_wav(args.url, clips[0])
+
+    results = []
+    for path in clips:
+        ref_path = os.path.splitext(path)[0] + ".txt"
+        ref = words(open(ref_path, encoding="utf-8").read()) if os.path.exists(ref_path) else []
+
+        t0 = time.perf_counter()
+        resp = post_wav(args.url, path)
+        dt = time.perf_counter() - t0
+
+        hyp = words(resp.get("text", ""))
+        results.append({
+            "clip": os.path.basename(path),
+            "text": resp.get("text", ""),
+            "model": resp.get("model"),
+            "escalated": resp.get("escalated", False),
+            "latency_sec": round(dt, 4),
+            "ref_words": len(ref),
+            "word_errors": word_errors(ref, hyp) if ref else 0,
+        })
+        print(f"{results[-1]['clip']:<32} {dt:6.3f}s  {resp.get('model')!s:<8} {resp.get('text', '')[:60]}")
+
+    summary = summarize(results)
+    print("\n" + json.dumps(summary, indent=2))
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "results": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            base = json.load(f)["summary"]
+        print("\n             baseline    this run")
+        for key in ("wer", "p50_sec", "p95_sec"):
+            print(f"{key:<12} {base[key]!s:>9}   {summary[key]!s:>9}")
+
+
+if __name__ == "__main__":
+    main()